@@ -1,17 +1,56 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from datetime import date, timedelta
 from app.services.chat_service import chat_service
+from app.services.metrics_rollup import metrics_rollup
+from app.core.intent_classifier import intent_classifier
+from app.core.llm import llm_service
+from app.core.llm_gateway import llm_gateway
+from app.core.metrics import stage_metrics
+from app.core.answer_cache import answer_cache
+from app.core.chat_sessions import chat_sessions
+from app.core.query_counters import query_counters
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/")
-def get_metrics():
+def get_metrics(agent_id: Optional[str] = None):
     logger.info("Received request for metrics")
-    metrics = chat_service.get_metrics()
+    metrics = chat_service.get_metrics(agent_id)
     logger.info("Returning metrics data")
     return metrics
 
+@router.post("/reconcile")
+def reconcile_metrics():
+    """Recount the query counters from every stored message"""
+    logger.info("Received request to reconcile analytics counters")
+    return {**query_counters.reconcile(), "metrics": query_counters.get()}
+
+@router.get("/range")
+def get_range_metrics(start: Optional[str] = None, end: Optional[str] = None,
+                      agent_id: Optional[List[str]] = Query(None)):
+    """
+    Query metrics for start..end (ISO dates, inclusive; default the last 7 days), optionally only
+    for the given agent_id(s): totals, per day and per agent. Served from the daily rollups.
+    """
+    logger.info(f"Received request for metrics from {start} to {end}")
+    try:
+        end_day = date.fromisoformat(end) if end else date.today()
+        start_day = date.fromisoformat(start) if start else end_day - timedelta(days=6)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be dates (YYYY-MM-DD)")
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return metrics_rollup.get_range(start_day.isoformat(), end_day.isoformat(), agent_id)
+
+@router.post("/rollup")
+def run_metrics_rollup():
+    """Roll up closed days into the Metrics sheet now instead of waiting for the background job"""
+    logger.info("Received request to run the metrics rollup")
+    return metrics_rollup.rollup()
+
 @router.get("/escalations")
 def get_escalations():
     logger.info("Received request for escalations")
@@ -26,6 +65,42 @@ def get_activity():
     logger.info(f"Returning {len(activity)} activity items")
     return activity
 
+@router.get("/intent-classifier")
+def get_intent_classifier_stats():
+    """Fast-path hit rate, agreement with the LLM, the loaded model and the LLM intent cache"""
+    logger.info("Received request for intent classifier stats")
+    return {**intent_classifier.stats(), "llm_cache": llm_service.intent_cache.stats()}
+
+@router.post("/intent-classifier/reload")
+def reload_intent_classifier():
+    """Pick up a model written by train_intent_model.py without a restart"""
+    logger.info("Received request to reload the intent model")
+    return {"loaded": intent_classifier.reload(), **intent_classifier.stats()['model']}
+
+@router.get("/answer-cache")
+def get_answer_cache_stats():
+    """Hits (exact and near-duplicate), size and evictions of the per-agent answer cache"""
+    logger.info("Received request for answer cache stats")
+    return answer_cache.stats()
+
+@router.get("/stages")
+def get_stage_latencies():
+    """p50/p95/p99 latency of each chat pipeline stage (load, classify, respond, store, total)"""
+    logger.info("Received request for chat stage latencies")
+    return stage_metrics.stats()
+
+@router.get("/llm-gateway")
+def get_llm_gateway_stats():
+    """Queue depth, in-flight and coalesced Gemini calls, rate limit and circuit breaker state"""
+    logger.info("Received request for LLM gateway stats")
+    return llm_gateway.stats()
+
+@router.get("/chat-sessions")
+def get_chat_session_stats():
+    """Hits, evictions and size of the in-process conversation session pool"""
+    logger.info("Received request for chat session pool stats")
+    return chat_sessions.stats()
+
 @router.get("/overview")
 def get_overview():
     """
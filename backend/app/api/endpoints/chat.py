@@ -1,19 +1,66 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.models.chat import ChatRequest, ChatResponse
 from app.services.chat_service import chat_service
+from typing import Any, AsyncIterator, Awaitable
+import asyncio
+import json
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# How often a running chat turn checks whether its client has gone away
+DISCONNECT_POLL_SECONDS = 0.5
+
+async def _cancel_on_disconnect(http_request: Request, work: Awaitable[Any]) -> Any:
+    """Await work, cancelling it (and any in-flight model call) if the client disconnects first"""
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected; cancelling chat turn")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
 @router.post("/", response_model=ChatResponse)
-async def chat_message(request: ChatRequest):
+async def chat_message(request: ChatRequest, http_request: Request):
     logger.info(f"Received chat request for Agent ID: {request.agent_id}")
     logger.debug(f"Query: {request.query}")
     try:
-        response = await chat_service.process_chat(request)
+        response = await _cancel_on_disconnect(http_request, chat_service.process_chat(request))
         logger.info(f"Chat processed successfully. Intent: {response.intent}, Escalated: {response.escalated}")
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+async def _sse_events(http_request: Request, request: ChatRequest) -> AsyncIterator[str]:
+    """Format chat_service.stream_chat events as server-sent events"""
+    try:
+        async for event, data in chat_service.stream_chat(request):
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected; stopping chat stream")
+                return
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    except Exception as e:
+        logger.error(f"Error streaming chat: {str(e)}")
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Chat turn as server-sent events: meta (intent/escalation), token chunks, then done"""
+    logger.info(f"Received streaming chat request for Agent ID: {request.agent_id}")
+    return StreamingResponse(
+        _sse_events(http_request, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,24 +1,22 @@
 from fastapi import APIRouter, HTTPException
-from app.core.sheets_db import sheets_db
+from app.core.async_storage import async_db
+from app.models.chat import ResolveConversationsRequest
 from typing import List, Dict, Any
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Columns the conversation list shows
+CONVERSATION_LIST_COLUMNS = ['conversation_id', 'agent_id', 'user_id', 'started_at', 'ended_at', 'status', 'total_messages']
+
 @router.get("/agent/{agent_id}")
-def get_agent_conversations(agent_id: str):
+async def get_agent_conversations(agent_id: str):
     """Get all conversations for a specific agent"""
     logger.info(f"Fetching conversations for agent: {agent_id}")
     
     try:
-        all_conversations = sheets_db.get_all_rows('Conversations')
-        
-        # Filter by agent_id
-        agent_conversations = [
-            conv for conv in all_conversations 
-            if conv.get('agent_id') == agent_id
-        ]
+        agent_conversations = await async_db.find_rows('Conversations', 'agent_id', agent_id)
         
         # Sort by started_at (most recent first)
         agent_conversations.sort(key=lambda x: x.get('started_at', ''), reverse=True)
@@ -30,18 +28,17 @@ def get_agent_conversations(agent_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{conversation_id}/messages")
-def get_conversation_messages(conversation_id: str):
+async def get_conversation_messages(conversation_id: str):
     """Get all messages in a conversation"""
     logger.info(f"Fetching messages for conversation: {conversation_id}")
     
     try:
-        all_messages = sheets_db.get_all_rows('Messages')
-        
-        # Filter by conversation_id
-        conversation_messages = [
-            msg for msg in all_messages 
-            if msg.get('conversation_id') == conversation_id
-        ]
+        # Messages can't predate their conversation, so older partitions are skipped
+        conversation = await async_db.find_row('Conversations', 'conversation_id', conversation_id)
+        started_at = str(conversation.get('started_at', '')) if conversation else ''
+        conversation_messages = await async_db.find_rows(
+            'Messages', 'conversation_id', conversation_id, since=started_at or None
+        )
         
         # Sort by timestamp
         conversation_messages.sort(key=lambda x: x.get('timestamp', ''))
@@ -53,14 +50,14 @@ def get_conversation_messages(conversation_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{conversation_id}/resolve")
-def resolve_conversation(conversation_id: str):
+async def resolve_conversation(conversation_id: str):
     """Mark a conversation as resolved"""
     logger.info(f"Resolving conversation: {conversation_id}")
     
     try:
         from datetime import datetime
         
-        success = sheets_db.update_row('Conversations', 'conversation_id', conversation_id, {
+        success = await async_db.update_row('Conversations', 'conversation_id', conversation_id, {
             'status': 'resolved',
             'ended_at': datetime.now().isoformat()
         })
@@ -76,14 +73,38 @@ def resolve_conversation(conversation_id: str):
         logger.error(f"Error resolving conversation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/resolve")
+async def resolve_conversations(request: ResolveConversationsRequest):
+    """Mark several conversations as resolved with one bulk update"""
+    logger.info(f"Resolving {len(request.conversation_ids)} conversations")
+    
+    try:
+        from datetime import datetime
+        
+        ended_at = datetime.now().isoformat()
+        resolved = await async_db.update_rows('Conversations', 'conversation_id', {
+            conversation_id: {'status': 'resolved', 'ended_at': ended_at}
+            for conversation_id in request.conversation_ids
+        })
+        
+        logger.info(f"Resolved {resolved}/{len(request.conversation_ids)} conversations")
+        return {"resolved": resolved, "requested": len(request.conversation_ids)}
+    except Exception as e:
+        logger.error(f"Error resolving conversations: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/")
-def get_all_conversations():
+async def get_all_conversations():
     """Get all conversations across all agents with agent names"""
     logger.info("Fetching all conversations")
     
     try:
-        conversations = sheets_db.get_all_rows('Conversations')
-        agents = sheets_db.get_all_rows('Agents')
+        # One request for both tables, skipping large columns such as system_instructions
+        tables = await async_db.get_columns({
+            'Conversations': CONVERSATION_LIST_COLUMNS,
+            'Agents': ['agent_id', 'name'],
+        })
+        conversations, agents = tables['Conversations'], tables['Agents']
         
         # Create a map of agent_id to agent_name (Google Sheet uses column 'agent_id')
         agent_map = {}
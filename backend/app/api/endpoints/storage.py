@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from app.core.storage import db
+from app.core.spool import spool
+from typing import Optional
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/cache")
+def get_cache_stats():
+    """Hit/miss counters and size of the table cache"""
+    logger.info("Received request for storage cache stats")
+    return db.cache_stats()
+
+@router.post("/cache/refresh")
+def refresh_cache(sheet: Optional[str] = None):
+    """Reload one sheet (or every cached sheet) from the backing store"""
+    logger.info(f"Received request to refresh storage cache: {sheet or 'all sheets'}")
+    refreshed = db.refresh(sheet)
+    return {"refreshed": refreshed}
+
+@router.post("/compact")
+def compact_storage(sheet: Optional[str] = None):
+    """Rewrite sheets without their tombstoned rows now instead of waiting for a quiet period"""
+    logger.info(f"Received request to compact storage: {sheet or 'all sheets with tombstones'}")
+    removed = db.compact(sheet)
+    return {"removed": removed}
+
+@router.get("/wal")
+def get_wal_stats():
+    """Backlog and checkpoint of the write-ahead spool"""
+    logger.info("Received request for write-ahead spool stats")
+    return spool.stats() if spool else {"enabled": False}
@@ -0,0 +1,133 @@
+from app.core.config import settings
+from app.core.storage import db
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityFeed:
+    """
+    Newest chat turns in a bounded ring buffer, plus an agent_id -> name map, so the activity
+    feed is served without storage reads. Seeded from Messages and Agents (one read each) at
+    startup, then fed by each completed turn and kept in step with agent changes. Per process.
+    """
+    def __init__(self, max_entries: int):
+        self._entries: deque = deque(maxlen=max(max_entries, 1))
+        self._agent_names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._seeded = False
+        # Agents forgotten while a seed is reading storage; None when no seed is running
+        self._forgotten: Optional[set] = None
+
+    @staticmethod
+    def _entry(user: Optional[Dict[str, Any]], assistant: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'message_id': str(assistant.get('message_id', '')),
+            'agent_id': str(assistant.get('agent_id', '')),
+            'query': str(user.get('content', '') if user else assistant.get('content', ''))[:100],
+            'response': str(assistant.get('content', ''))[:100],
+            'intent': assistant.get('intent', ''),
+            'escalated': assistant.get('escalated') == 'TRUE',
+            'timestamp': str(assistant.get('timestamp', '')),
+        }
+
+    def record(self, user: Dict[str, Any], assistant: Dict[str, Any]):
+        """Add a completed turn (its user and assistant Messages rows)"""
+        with self._lock:
+            self._entries.append(self._entry(user, assistant))
+
+    def set_agent(self, agent_id: str, name: str):
+        with self._lock:
+            self._agent_names[agent_id] = name
+            if self._forgotten is not None:
+                self._forgotten.discard(agent_id)
+
+    def forget_agent(self, agent_id: str):
+        """Deleted agents show as Unknown, as before"""
+        with self._lock:
+            self._agent_names.pop(agent_id, None)
+            if self._forgotten is not None:
+                self._forgotten.add(agent_id)
+
+    def seed(self):
+        """Load the newest turns and every active agent's name from storage (no-op once seeded)"""
+        with self._seed_lock:
+            if self._seeded:
+                return
+            with self._lock:
+                self._forgotten = set()
+            try:
+                seeded, agent_names = self._read_seed()
+            except Exception:
+                with self._lock:
+                    self._forgotten = None
+                raise
+
+            with self._lock:
+                # Turns recorded while seeding are newer than anything read; keep them once
+                recorded = list(self._entries)
+                known = {entry['message_id'] for entry in recorded}
+                self._entries.clear()
+                self._entries.extend(entry for entry in seeded if entry['message_id'] not in known)
+                self._entries.extend(recorded)
+                # Names set meanwhile come from agent changes and win over what was read;
+                # agents deleted meanwhile may still have been read as active
+                self._agent_names = {**agent_names, **self._agent_names}
+                for agent_id in self._forgotten:
+                    self._agent_names.pop(agent_id, None)
+                self._forgotten = None
+                self._seeded = True
+            logger.info(f"Activity feed seeded with {len(seeded)} turns and {len(agent_names)} agents")
+
+    def _read_seed(self) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """Newest turns and active agents' names, read from storage"""
+        limit = self._entries.maxlen
+        # Only recent partitions are read unless they hold too few messages
+        since = (datetime.now() - timedelta(days=settings.ACTIVITY_LOOKBACK_DAYS)).isoformat()
+        messages = db.get_all_rows('Messages', since=since)
+        if len([m for m in messages if m.get('role') == 'assistant']) < limit:
+            messages = db.get_all_rows('Messages')
+
+        # Both messages of a turn share conversation_id and timestamp
+        users = {
+            (m.get('conversation_id'), m.get('timestamp')): m
+            for m in messages if m.get('role') == 'user'
+        }
+        assistant_messages = [m for m in messages if m.get('role') == 'assistant']
+        assistant_messages.sort(key=lambda x: x.get('timestamp', ''))
+        seeded = [
+            self._entry(users.get((m.get('conversation_id'), m.get('timestamp'))), m)
+            for m in assistant_messages[-limit:]
+        ]
+        agent_names = {
+            str(agent.get('agent_id')): agent.get('name')
+            for agent in db.get_all_rows('Agents') if agent.get('status') == 'active'
+        }
+        return seeded, agent_names
+
+    def get(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Newest turns first, joined to agent names"""
+        if not self._seeded:
+            self.seed()
+        with self._lock:
+            entries = list(self._entries)[-limit:] if limit > 0 else []
+            agent_names = self._agent_names
+            return [
+                {
+                    "query": entry['query'],
+                    "response": entry['response'],
+                    "agent_name": agent_names.get(entry['agent_id']) or "Unknown",
+                    "intent": entry['intent'],
+                    "escalated": entry['escalated'],
+                    "timestamp": entry['timestamp'],
+                }
+                for entry in reversed(entries)
+            ]
+
+# Singleton instance
+activity_feed = ActivityFeed(settings.ACTIVITY_FEED_MAX_ENTRIES)
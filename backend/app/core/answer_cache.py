@@ -0,0 +1,200 @@
+from app.core.cache import normalize_query
+from app.core.config import settings
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_SHINGLE_SIZE = 4
+_BANDS = 16
+_SENTENCES = re.compile(r"[.?!]+\s+")
+_WORDS = re.compile(r"[\w][\w'@./-]*")
+
+
+def anchor_tokens(query: str) -> frozenset:
+    """
+    Numbers, codes and proper nouns in a query (e.g. zip codes, order IDs, product names).
+    Near-duplicates differing in one of these usually need a different answer.
+    """
+    anchors = set()
+    for sentence in _SENTENCES.split(query):
+        for position, word in enumerate(_WORDS.findall(sentence)):
+            word = word.rstrip("'@./-")
+            if any(c.isdigit() for c in word):
+                anchors.add(word.lower())
+            # Capitalised words are names, except at a sentence start and the pronoun I
+            elif position > 0 and word[:1].isupper() and word != 'I':
+                anchors.add(word.lower())
+    return frozenset(anchors)
+
+
+class MinHasher:
+    """MinHash signatures over character shingles; matching slots estimate Jaccard similarity"""
+    def __init__(self, permutations: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(permutations)
+        ]
+
+    @staticmethod
+    def shingles(text: str) -> Set[int]:
+        if len(text) <= _SHINGLE_SIZE:
+            return {zlib.crc32(text.encode())}
+        return {zlib.crc32(text[i:i + _SHINGLE_SIZE].encode()) for i in range(len(text) - _SHINGLE_SIZE + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        shingles = self.shingles(text)
+        return tuple(min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles) for a, b in self.permutations)
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class AnswerCache:
+    """
+    Answers to first-turn Informational queries, keyed by (agent_id, agent updated_at, normalized query).
+    Optionally serves near-duplicate queries whose MinHash similarity clears ANSWER_CACHE_SIMILARITY,
+    found through LSH band buckets, as long as both mention the same numbers and names
+    (see anchor_tokens). Bounded by total cached bytes (LRU) and a TTL.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float, similarity: float, permutations: int):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.hasher = MinHasher(permutations) if similarity > 0 else None
+        self._rows = max(1, permutations // _BANDS)
+
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, str, int, Tuple[int, ...]], Set[Tuple[str, str, str]]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'near_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * self._rows:(band + 1) * self._rows])
+            for band in range(len(signature) // self._rows)
+        ]
+
+    def _remove(self, key: Tuple[str, str, str]):
+        """Drop an entry and its bucket memberships (call under lock)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+        for band, values in entry['bands']:
+            bucket_key = (key[0], key[1], band, values)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def _fresh(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """Entry for key unless it expired (call under lock)"""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry['stored_at'] >= self.ttl_seconds:
+            self._remove(key)
+            return None
+        return entry
+
+    def get(self, agent, query: str) -> Optional[Dict[str, Any]]:
+        """Cached {'answer', 'confidence'} for this agent version and query, if any"""
+        if self.max_bytes <= 0:
+            return None
+        normalized = normalize_query(query)
+        key = (str(agent.id), str(agent.updated_at or ''), normalized)
+        with self._lock:
+            entry = self._fresh(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return {'answer': entry['answer'], 'confidence': entry['confidence']}
+
+        # Only pay for a signature once the exact lookup has missed
+        signature = self.hasher.signature(normalized) if self.hasher else None
+        anchors = anchor_tokens(query) if signature else None
+        with self._lock:
+            if signature:
+                candidates = set()
+                for band, values in self._bands(signature):
+                    candidates |= self._buckets.get((key[0], key[1], band, values), set())
+                best_key, best_score = None, 0.0
+                for candidate in candidates:
+                    candidate_entry = self._fresh(candidate)
+                    if not candidate_entry or candidate_entry['anchors'] != anchors:
+                        continue
+                    score = MinHasher.similarity(signature, candidate_entry['signature'])
+                    if score > best_score:
+                        best_key, best_score = candidate, score
+                if best_key and best_score >= self.similarity:
+                    entry = self._entries[best_key]
+                    self._entries.move_to_end(best_key)
+                    self._stats['near_hits'] += 1
+                    logger.debug(f"Answer cache near hit ({best_score:.2f}): '{normalized}' ~ '{best_key[2]}'")
+                    return {'answer': entry['answer'], 'confidence': entry['confidence']}
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, agent, query: str, answer: str, confidence: float):
+        if self.max_bytes <= 0:
+            return
+        normalized = normalize_query(query)
+        key = (str(agent.id), str(agent.updated_at or ''), normalized)
+        signature = self.hasher.signature(normalized) if self.hasher else None
+        anchors = anchor_tokens(query) if signature else None
+        size = len(answer.encode()) + len(normalized.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            bands = self._bands(signature) if signature else []
+            self._entries[key] = {
+                'answer': answer, 'confidence': confidence, 'signature': signature,
+                'anchors': anchors, 'bands': bands, 'size': size, 'stored_at': time.monotonic(),
+            }
+            self._bytes += size
+            for band, values in bands:
+                self._buckets.setdefault((key[0], key[1], band, values), set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def invalidate_agent(self, agent_id: str) -> int:
+        """Drop every cached answer of an agent (all versions); returns how many"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == str(agent_id)]
+            for key in keys:
+                self._remove(key)
+            self._stats['invalidations'] += len(keys)
+        if keys:
+            logger.info(f"Dropped {len(keys)} cached answers of agent {agent_id}")
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['near_hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round((self._stats['hits'] + self._stats['near_hits']) / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'similarity': self.similarity,
+            }
+
+# Singleton instance
+answer_cache = AnswerCache(
+    settings.ANSWER_CACHE_MAX_BYTES,
+    settings.ANSWER_CACHE_TTL_SECONDS,
+    settings.ANSWER_CACHE_SIMILARITY,
+    settings.ANSWER_CACHE_MINHASH_PERMUTATIONS,
+)
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.core.storage import db
+from app.core.storage_backend import StorageBackend
+import asyncio
+import functools
+import logging
+from typing import List, Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+class AsyncStorage:
+    """
+    Async façade over the storage backend.
+    Every call runs on a bounded I/O thread pool so blocking gspread/SQLite work
+    never stalls the event loop, and each call is limited by a timeout.
+    """
+    def __init__(self, backend: StorageBackend, max_workers: int, timeout: float):
+        self.backend = backend
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-io")
+        logger.info(f"Async storage ready ({backend.name}, workers={max_workers}, timeout={timeout}s)")
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking storage call on the I/O pool and await its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout=timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # The worker thread can't be interrupted; it finishes in the background
+            logger.error(f"Storage call {getattr(fn, '__name__', fn)} timed out after {timeout or self.timeout}s")
+            raise
+
+    async def insert_row(self, sheet_name: str, data: Dict[str, Any]) -> bool:
+        return await self.run(self.backend.insert_row, sheet_name, data)
+
+    async def insert_rows(self, sheet_name: str, rows: List[Dict[str, Any]]) -> bool:
+        return await self.run(self.backend.insert_rows, sheet_name, rows)
+
+    async def get_all_rows(self, sheet_name: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.backend.get_all_rows, sheet_name, since)
+
+    async def get_columns(self, columns_by_sheet: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        return await self.run(self.backend.get_columns, columns_by_sheet)
+
+    async def find_row(self, sheet_name: str, key: str, value: Any) -> Optional[Dict[str, Any]]:
+        return await self.run(self.backend.find_row, sheet_name, key, value)
+
+    async def find_rows(self, sheet_name: str, key: str, value: Any, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.backend.find_rows, sheet_name, key, value, since)
+
+    async def update_row(self, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> bool:
+        return await self.run(self.backend.update_row, sheet_name, key, value, updates)
+
+    async def update_rows(self, sheet_name: str, key: str, updates_by_value: Dict[Any, Dict[str, Any]]) -> int:
+        return await self.run(self.backend.update_rows, sheet_name, key, updates_by_value)
+
+    async def delete_row(self, sheet_name: str, key: str, value: Any) -> bool:
+        return await self.run(self.backend.delete_row, sheet_name, key, value)
+
+    def shutdown(self):
+        """Wait for in-flight storage calls, then stop the pool"""
+        self._executor.shutdown(wait=True)
+
+# Singleton instance
+async_db = AsyncStorage(db, settings.STORAGE_IO_WORKERS, settings.STORAGE_IO_TIMEOUT_SECONDS)
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import re
+import threading
+import time
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive form of a user query"""
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache bounded by entry count, with a per-entry TTL and hit/miss counters.
+    With refresh_on_hit the TTL counts from the last access instead, i.e. an idle timeout.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float, refresh_on_hit: bool = False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.refresh_on_hit = refresh_on_hit
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl_seconds:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            if self.refresh_on_hit:
+                self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or everything"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+            }
@@ -0,0 +1,61 @@
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.llm import llm_service
+from typing import List, Dict, Any
+
+
+class ChatSession:
+    """
+    Live state of one conversation between turns: its Conversations row, the rolling summary
+    and the messages after it, each already converted to Gemini content. Turns append to it,
+    so active conversations skip both the Messages read and the history conversion.
+    Only touched from the event loop, so it needs no lock.
+    """
+    def __init__(self, conversation: Dict[str, Any], messages: List[Dict[str, Any]], stored: bool = True):
+        # A copy, so turns never mutate a row held by a storage cache or write queue
+        self.conversation = dict(conversation)
+        self.conversation_id = str(conversation['conversation_id'])
+        # False until the first turn writes the Conversations row of a new conversation
+        self.stored = stored
+        # Empty messages add nothing to a prompt; dropping them keeps contents aligned with messages
+        self.messages = [message for message in messages if str(message.get('content') or '').strip()]
+        self.contents = llm_service.build_history(self.messages)
+        self._summary_contents = self._build_summary()
+
+    @property
+    def summary(self) -> str:
+        return str(self.conversation.get('summary') or '')
+
+    def _build_summary(self) -> list:
+        return llm_service.build_history([{'role': 'summary', 'content': self.summary}]) if self.summary else []
+
+    def history(self, window: int) -> list:
+        """Gemini contents for the summary plus the newest window messages"""
+        return self._summary_contents + (self.contents[-window:] if window else [])
+
+    def append(self, messages: List[Dict[str, Any]], updates: Dict[str, Any]):
+        """Record a finished turn: its stored messages and the Conversations updates written with it"""
+        messages = [message for message in messages if str(message.get('content') or '').strip()]
+        contents = llm_service.build_history(messages)
+        self.messages.extend(messages)
+        self.contents.extend(contents)
+        self.conversation.update(updates)
+
+    def fold(self, summary: str, summary_until: str):
+        """Replace the summary and drop the messages it now covers"""
+        self.conversation.update({'summary': summary, 'summary_until': summary_until})
+        kept = next(
+            (i for i, message in enumerate(self.messages) if str(message.get('timestamp', '')) >= summary_until),
+            len(self.messages)
+        )
+        del self.messages[:kept]
+        del self.contents[:kept]
+        self._summary_contents = self._build_summary()
+
+
+# Singleton instance: conversation_id -> ChatSession, LRU with an idle timeout
+chat_sessions = TTLCache(
+    settings.CHAT_SESSION_POOL_SIZE,
+    settings.CHAT_SESSION_IDLE_SECONDS,
+    refresh_on_hit=True,
+)
@@ -5,6 +5,66 @@ load_dotenv()
 
 class Settings:
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+
+    # "fake" swaps Gemini for an offline stand-in (load tests, CI): log-normal latency fitted to a
+    # median and p99, a 503 error rate, and intents scripted as phrase -> intent rules (JSON list)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "gemini").lower()
+    FAKE_LLM_LATENCY_MEDIAN_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MEDIAN_MS", "400"))
+    FAKE_LLM_LATENCY_P99_MS: float = float(os.getenv("FAKE_LLM_LATENCY_P99_MS", "2000"))
+    FAKE_LLM_ERROR_RATE: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+    FAKE_LLM_SCRIPT_PATH: str = os.getenv("FAKE_LLM_SCRIPT_PATH", "")
+
+    # Gemini call deadlines (covering all retries) and jittered exponential backoff for transient errors
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    LLM_CLASSIFY_TIMEOUT_SECONDS: float = float(os.getenv("LLM_CLASSIFY_TIMEOUT_SECONDS", "10"))
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+    LLM_BACKOFF_BASE_SECONDS: float = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+    LLM_BACKOFF_MAX_SECONDS: float = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+
+    # Gateway shared by all Gemini calls: concurrent requests, token-bucket rate (0 disables; set it to
+    # the project's Gemini quota), and a circuit breaker that fails fast after consecutive upstream
+    # failures (threshold 0 disables)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_RATE_LIMIT_PER_SECOND: float = float(os.getenv("LLM_RATE_LIMIT_PER_SECOND", "0"))
+    LLM_RATE_LIMIT_BURST: float = float(os.getenv("LLM_RATE_LIMIT_BURST", "20"))
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+    # Default per-tool limits for Transactional actions (a tool may override them when registered)
+    TOOL_TIMEOUT_SECONDS: float = float(os.getenv("TOOL_TIMEOUT_SECONDS", "10"))
+    TOOL_MAX_CONCURRENCY: int = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+
+    # Classify and answer in one structured-output call (false: separate classify + answer calls)
+    LLM_SINGLE_CALL: bool = os.getenv("LLM_SINGLE_CALL", "true").lower() == "true"
+
+    # Latest per-stage chat timings kept for GET /analytics/stages percentiles (per stage)
+    STAGE_METRICS_MAX_SAMPLES: int = int(os.getenv("STAGE_METRICS_MAX_SAMPLES", "2000"))
+
+    # Conversation history sent to Gemini: newest turns verbatim within this many (estimated) tokens,
+    # older turns folded into a rolling per-conversation summary (0 sends the whole history)
+    HISTORY_TOKEN_BUDGET: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+    HISTORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+    # In-process pool of live conversation sessions (LRU, evicted after an idle period; 0 disables)
+    CHAT_SESSION_POOL_SIZE: int = int(os.getenv("CHAT_SESSION_POOL_SIZE", "1000"))
+    CHAT_SESSION_IDLE_SECONDS: float = float(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+
+    # Local intent fast path (rules + model trained by train_intent_model.py) in front of Gemini
+    INTENT_MODEL_PATH: str = os.getenv("INTENT_MODEL_PATH", "intent_model.json")
+    INTENT_FAST_PATH_THRESHOLD: float = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.9"))
+    INTENT_MODEL_MIN_EXAMPLES: int = int(os.getenv("INTENT_MODEL_MIN_EXAMPLES", "50"))
+    # Share of fast-path answers re-checked by Gemini in the background to measure agreement
+    INTENT_SHADOW_RATE: float = float(os.getenv("INTENT_SHADOW_RATE", "0.05"))
+
+    # Normalized query -> intent cache for Gemini classifications (0 disables)
+    INTENT_CACHE_MAX_ENTRIES: int = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "10000"))
+    INTENT_CACHE_TTL_SECONDS: float = float(os.getenv("INTENT_CACHE_TTL_SECONDS", "86400"))
+
+    # Per-agent answer cache for first-turn Informational queries (max bytes 0 disables;
+    # similarity 0 matches exact normalized queries only, otherwise MinHash near-duplicates)
+    ANSWER_CACHE_MAX_BYTES: int = int(os.getenv("ANSWER_CACHE_MAX_BYTES", "8000000"))
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_CACHE_SIMILARITY: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))
+    ANSWER_CACHE_MINHASH_PERMUTATIONS: int = int(os.getenv("ANSWER_CACHE_MINHASH_PERMUTATIONS", "64"))
     GOOGLE_SHEETS_CREDENTIALS_FILE: str = os.getenv(
         "GOOGLE_SHEETS_CREDENTIALS_FILE",
         "crucial-baton-454006-m8-6cb842641f3a.json"
@@ -12,5 +72,55 @@ class Settings:
     # Alternative: provide credentials as JSON string in .env
     GOOGLE_SHEETS_CREDENTIALS_JSON: str = os.getenv("GOOGLE_SHEETS_CREDENTIALS_JSON", "")
     GOOGLE_SPREADSHEET_ID: str = os.getenv("GOOGLE_SPREADSHEET_ID", "")
+    # In-memory fake of the gspread API instead of a real spreadsheet (load tests, CI)
+    SHEETS_FAKE: bool = os.getenv("SHEETS_FAKE", "false").lower() == "true"
+    SHEETS_FAKE_LATENCY_MS: float = float(os.getenv("SHEETS_FAKE_LATENCY_MS", "0"))
+
+    # Storage backend: "sheets" (Google Sheets) or "sqlite" (local file at SQLITE_DB_PATH)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "sheets")
+    SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "support_portal.db")
+
+    # Thread pool behind the async storage façade
+    STORAGE_IO_WORKERS: int = int(os.getenv("STORAGE_IO_WORKERS", "16"))
+    STORAGE_IO_TIMEOUT_SECONDS: float = float(os.getenv("STORAGE_IO_TIMEOUT_SECONDS", "30"))
+
+    # Local write-ahead spool: chat writes are fsynced locally and replayed to storage in the background
+    STORAGE_WAL_ENABLED: bool = os.getenv("STORAGE_WAL_ENABLED", "false").lower() == "true"
+    STORAGE_WAL_PATH: str = os.getenv("STORAGE_WAL_PATH", "storage_wal.log")
+    STORAGE_WAL_BATCH_SIZE: int = int(os.getenv("STORAGE_WAL_BATCH_SIZE", "100"))
+    STORAGE_WAL_REPLAY_INTERVAL_SECONDS: float = float(os.getenv("STORAGE_WAL_REPLAY_INTERVAL_SECONDS", "1.0"))
+    STORAGE_WAL_MAX_ATTEMPTS: int = int(os.getenv("STORAGE_WAL_MAX_ATTEMPTS", "10"))
+    STORAGE_WAL_READ_WAIT_SECONDS: float = float(os.getenv("STORAGE_WAL_READ_WAIT_SECONDS", "5"))
+
+    # Write-behind: queue inserted rows per sheet and flush them with one append_rows call
+    SHEETS_WRITE_BEHIND: bool = os.getenv("SHEETS_WRITE_BEHIND", "false").lower() == "true"
+    SHEETS_FLUSH_MAX_ROWS: int = int(os.getenv("SHEETS_FLUSH_MAX_ROWS", "50"))
+    SHEETS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("SHEETS_FLUSH_INTERVAL_SECONDS", "2.0"))
+
+    # Read-through table cache for get_all_rows (TTL of 0 disables it)
+    SHEETS_CACHE_TTL_SECONDS: float = float(os.getenv("SHEETS_CACHE_TTL_SECONDS", "30"))
+    SHEETS_CACHE_MAX_ROWS: int = int(os.getenv("SHEETS_CACHE_MAX_ROWS", "50000"))
+
+    # Background compaction of tombstoned (deleted) rows; interval of 0 disables it
+    SHEETS_COMPACTION_INTERVAL_SECONDS: float = float(os.getenv("SHEETS_COMPACTION_INTERVAL_SECONDS", "300"))
+    SHEETS_COMPACTION_QUIET_SECONDS: float = float(os.getenv("SHEETS_COMPACTION_QUIET_SECONDS", "60"))
+
+    # Comma-separated tables (Messages, Escalations) stored as one worksheet per month
+    SHEETS_PARTITIONED_SHEETS: str = os.getenv("SHEETS_PARTITIONED_SHEETS", "")
+
+    # How far back the startup seed of the activity feed looks before falling back to a full scan
+    ACTIVITY_LOOKBACK_DAYS: int = int(os.getenv("ACTIVITY_LOOKBACK_DAYS", "31"))
+    # Recent turns kept in memory for the activity feed
+    ACTIVITY_FEED_MAX_ENTRIES: int = int(os.getenv("ACTIVITY_FEED_MAX_ENTRIES", "50"))
+
+    # Running query counters behind GET /analytics/: local checkpoint file ("" keeps them in memory
+    # only, rescanning Messages on every start) and how often it is rewritten while counts change
+    ANALYTICS_COUNTERS_PATH: str = os.getenv("ANALYTICS_COUNTERS_PATH", "analytics_counters.json")
+    ANALYTICS_CHECKPOINT_INTERVAL_SECONDS: float = float(os.getenv("ANALYTICS_CHECKPOINT_INTERVAL_SECONDS", "60"))
+
+    # Daily per-agent rollup of Messages into the Metrics sheet: how often it checks for newly closed
+    # days (0 disables the job) and how long after midnight a day counts as closed
+    METRICS_ROLLUP_INTERVAL_SECONDS: float = float(os.getenv("METRICS_ROLLUP_INTERVAL_SECONDS", "3600"))
+    METRICS_ROLLUP_GRACE_SECONDS: float = float(os.getenv("METRICS_ROLLUP_GRACE_SECONDS", "600"))
 
 settings = Settings()
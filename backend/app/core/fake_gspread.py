@@ -0,0 +1,164 @@
+"""
+In-memory stand-in for the subset of the gspread API that GoogleSheetsDB uses, so the Sheets
+backend can run (and be load tested) without credentials or a real spreadsheet.
+Every API call sleeps for a simulated round trip, like the HTTP request it replaces.
+"""
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, numericise_all
+from typing import List, Dict, Any, Optional
+import random
+import threading
+import time
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, rows: int, cols: int):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._rows: List[List[str]] = []
+
+    def _grid(self, a1_range: str) -> Dict[str, int]:
+        grid = a1_range_to_grid_range(a1_range.split('!')[-1])
+        return {
+            'row_start': grid.get('startRowIndex', 0),
+            'row_end': grid.get('endRowIndex', len(self._rows)),
+            'col_start': grid.get('startColumnIndex', 0),
+            'col_end': grid.get('endColumnIndex', self.col_count),
+        }
+
+    def _set(self, row_idx: int, col_idx: int, value: Any):
+        """Write one cell (0-based), growing the grid like Sheets does"""
+        while len(self._rows) <= row_idx:
+            self._rows.append([])
+        row = self._rows[row_idx]
+        while len(row) <= col_idx:
+            row.append('')
+        row[col_idx] = '' if value is None else str(value)
+        self.row_count = max(self.row_count, len(self._rows))
+        self.col_count = max(self.col_count, len(row))
+
+    def _write(self, a1_range: str, values: List[List[Any]]):
+        grid = self._grid(a1_range)
+        for row_offset, row in enumerate(values):
+            for col_offset, value in enumerate(row):
+                self._set(grid['row_start'] + row_offset, grid['col_start'] + col_offset, value)
+
+    @staticmethod
+    def _trim(rows: List[List[str]]) -> List[List[str]]:
+        """Drop trailing empty cells and rows, as the Sheets API does"""
+        values = [row[:max((i + 1 for i, cell in enumerate(row) if cell != ''), default=0)] for row in rows]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def _read(self, a1_range: str) -> List[List[str]]:
+        grid = self._grid(a1_range)
+        return self._trim([row[grid['col_start']:grid['col_end']] for row in self._rows[grid['row_start']:grid['row_end']]])
+
+    def _append(self, rows: List[List[Any]]):
+        end = len(self._rows)
+        while end and not any(self._rows[end - 1]):
+            end -= 1
+        for offset, row in enumerate(rows):
+            for col_idx, value in enumerate(row):
+                self._set(end + offset, col_idx, value)
+
+    def row_values(self, row: int) -> List[str]:
+        with self.spreadsheet.call():
+            return self._trim([self._rows[row - 1]])[0] if len(self._rows) >= row and any(self._rows[row - 1]) else []
+
+    def get_all_values(self) -> List[List[str]]:
+        with self.spreadsheet.call():
+            width = max((len(row) for row in self._rows), default=0)
+            return [row + [''] * (width - len(row)) for row in self._trim(self._rows)]
+
+    def get_all_records(self, numericise_ignore: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        with self.spreadsheet.call():
+            values = self._trim(self._rows)
+        if not values:
+            return []
+        headers = values[0]
+        records = []
+        for row in values[1:]:
+            cells = row + [''] * (len(headers) - len(row))
+            if numericise_ignore != ['all']:
+                cells = numericise_all(cells)
+            records.append(dict(zip(headers, cells)))
+        return records
+
+    def append_row(self, values: List[Any], **kwargs):
+        with self.spreadsheet.call():
+            self._append([values])
+
+    def append_rows(self, values: List[List[Any]], **kwargs):
+        with self.spreadsheet.call():
+            self._append(values)
+
+    def update(self, values: List[List[Any]], range_name: Optional[str] = None, **kwargs):
+        with self.spreadsheet.call():
+            self._write(range_name or 'A1', values)
+
+    def batch_update(self, data: List[Dict[str, Any]], **kwargs):
+        with self.spreadsheet.call():
+            for entry in data:
+                self._write(entry['range'], entry['values'])
+
+    def add_cols(self, cols: int):
+        with self.spreadsheet.call():
+            self.col_count += cols
+
+
+class FakeSpreadsheet:
+    def __init__(self, key: str, latency_seconds: float):
+        self.id = key
+        self.title = f"fake-{key}"
+        self.latency_seconds = latency_seconds
+        self._worksheets: Dict[str, FakeWorksheet] = {}
+        # Sheets serialises writes to one spreadsheet; so does the fake
+        self._lock = threading.RLock()
+        self.calls = 0
+
+    def call(self):
+        """One simulated API round trip: sleep (jittered around the configured latency), then hold the lock"""
+        self.calls += 1
+        if self.latency_seconds > 0:
+            time.sleep(random.uniform(0.5, 1.5) * self.latency_seconds)
+        return self._lock
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        with self.call():
+            if title not in self._worksheets:
+                raise WorksheetNotFound(title)
+            return self._worksheets[title]
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        with self.call():
+            return list(self._worksheets.values())
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        with self.call():
+            worksheet = FakeWorksheet(self, title, rows, cols)
+            self._worksheets[title] = worksheet
+            return worksheet
+
+    def values_batch_get(self, ranges: List[str], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self.call():
+            value_ranges = []
+            for a1_range in ranges:
+                title = a1_range.split('!')[0].strip("'")
+                value_ranges.append({'range': a1_range, 'values': self._worksheets[title]._read(a1_range)})
+            return {'spreadsheetId': self.id, 'valueRanges': value_ranges}
+
+
+class FakeClient:
+    """Replaces the authorized gspread client; spreadsheets live for the life of the process"""
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self._spreadsheets: Dict[str, FakeSpreadsheet] = {}
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        if key not in self._spreadsheets:
+            self._spreadsheets[key] = FakeSpreadsheet(key, self.latency_seconds)
+        return self._spreadsheets[key]
@@ -0,0 +1,140 @@
+"""
+Offline stand-in for the google-genai client (client.aio.models.generate_content and
+generate_content_stream), so the whole chat pipeline, gateway and retries included, can run
+without a Gemini key. Latency follows a log-normal distribution fitted to a median and a p99,
+a share of calls fail with 503, and intents come from a script of phrase -> intent rules.
+"""
+from app.core.llm import VALID_INTENTS
+from google.genai import types
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+
+logger = logging.getLogger(__name__)
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z99 = 2.326
+
+# Used when no script file is configured; first matching phrase wins
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {'match': 'human', 'intent': 'Escalation', 'confidence': 0.97},
+    {'match': 'manager', 'intent': 'Escalation', 'confidence': 0.95},
+    {'match': 'refund', 'intent': 'Transactional', 'confidence': 0.93},
+    {'match': 'order', 'intent': 'Transactional', 'confidence': 0.9},
+    {'match': 'address', 'intent': 'Transactional', 'confidence': 0.9},
+    {'match': 'not sure', 'intent': 'Informational', 'confidence': 0.4},
+]
+DEFAULT_CONFIDENCE = 0.92
+
+_CLASSIFY_QUERY = re.compile(r"User query: (.*?)\n\nRespond with only", re.S)
+_PROMPT_QUERY = re.compile(r"\nUser: (.*)$", re.S)
+
+
+class FakeAPIError(Exception):
+    """Looks like a google-genai APIError to LLMService._is_retryable"""
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.parsed = None
+
+
+class FakeModels:
+    def __init__(self, latency_median_ms: float, latency_p99_ms: float, error_rate: float,
+                 script: List[Dict[str, Any]], seed: Optional[int] = None):
+        self.mu = math.log(max(latency_median_ms, 0.001) / 1000)
+        self.sigma = max(math.log(max(latency_p99_ms, latency_median_ms) / max(latency_median_ms, 0.001)), 0.0) / _Z99
+        self.error_rate = error_rate
+        self.script = script
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _latency(self) -> float:
+        return self._random.lognormvariate(self.mu, self.sigma)
+
+    async def _respond(self):
+        """Wait one simulated round trip; fail it with a 503 at the configured rate"""
+        self.calls += 1
+        if self._random.random() < self.error_rate:
+            await asyncio.sleep(self._latency() / 4)
+            raise FakeAPIError(503, "UNAVAILABLE (fake)")
+        await asyncio.sleep(self._latency())
+
+    @staticmethod
+    def _query(contents: Any) -> str:
+        """The latest user text of a request"""
+        if isinstance(contents, str):
+            match = _CLASSIFY_QUERY.search(contents) or _PROMPT_QUERY.search(contents)
+            return (match.group(1) if match else contents).strip()
+        for content in reversed(contents or []):
+            if isinstance(content, types.Content) and content.role == 'user' and content.parts:
+                return content.parts[0].text or ''
+        return ''
+
+    def _intent(self, query: str) -> Dict[str, Any]:
+        lowered = query.lower()
+        for rule in self.script:
+            if rule['match'].lower() in lowered:
+                return rule
+        return {'intent': 'Informational', 'confidence': DEFAULT_CONFIDENCE}
+
+    def _text(self, contents: Any, config: Optional[types.GenerateContentConfig]) -> str:
+        query = self._query(contents)
+        if isinstance(contents, str) and contents.startswith("You are an intent classifier"):
+            return self._intent(query)['intent']
+        if isinstance(contents, str) and contents.startswith("You maintain a running summary"):
+            return f"The user and the assistant exchanged messages about: {query[:80]}"
+        answer = f"(offline reply) Here is what I found about \"{query[:80]}\". " \
+                 f"Our team is happy to help with anything else."
+        if config is not None and config.response_schema is not None:
+            rule = self._intent(query)
+            return json.dumps({
+                'intent': rule['intent'],
+                'confidence': rule.get('confidence', DEFAULT_CONFIDENCE),
+                'answer': answer if rule['intent'] == 'Informational' else '',
+            })
+        return answer
+
+    async def generate_content(self, model: str, contents: Any,
+                               config: Optional[types.GenerateContentConfig] = None) -> _FakeResponse:
+        await self._respond()
+        return _FakeResponse(self._text(contents, config))
+
+    async def generate_content_stream(self, model: str, contents: Any,
+                                      config: Optional[types.GenerateContentConfig] = None) -> AsyncIterator[_FakeResponse]:
+        words = self._text(contents, config).split(' ')
+
+        async def chunks():
+            # Like the SDK, the request (and any error) happens on the first __anext__
+            await self._respond()
+            for start in range(0, len(words), 4):
+                await asyncio.sleep(0.01)
+                yield _FakeResponse(' '.join(words[start:start + 4]) + ' ')
+        return chunks()
+
+
+class FakeAio:
+    def __init__(self, models: FakeModels):
+        self.models = models
+
+
+class FakeGeminiClient:
+    """Drop-in for genai.Client as used by LLMService"""
+    def __init__(self, latency_median_ms: float, latency_p99_ms: float, error_rate: float,
+                 script_path: str = "", seed: Optional[int] = None):
+        script = DEFAULT_SCRIPT
+        if script_path:
+            with open(script_path, encoding='utf-8') as f:
+                script = json.load(f)
+            unknown = {rule['intent'] for rule in script} - set(VALID_INTENTS)
+            if unknown:
+                raise ValueError(f"Unknown intents in {script_path}: {', '.join(sorted(unknown))}")
+        self.aio = FakeAio(FakeModels(latency_median_ms, latency_p99_ms, error_rate, script, seed))
@@ -0,0 +1,52 @@
+from typing import List, Dict, Any, Tuple
+
+# Rough characters per token for English text; avoids a count_tokens round trip on every turn
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text or '') // CHARS_PER_TOKEN + 1
+
+
+def _turns(messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group consecutive messages sharing a timestamp (a user message and its reply) so a turn is never split"""
+    turns: List[List[Dict[str, Any]]] = []
+    for message in messages:
+        if turns and turns[-1][0].get('timestamp') == message.get('timestamp'):
+            turns[-1].append(message)
+        else:
+            turns.append([message])
+    return turns
+
+
+def _newest_turns(turns: List[List[Dict[str, Any]]], budget: int) -> int:
+    """How many of the newest turns fit in budget tokens (always at least one)"""
+    used = 0
+    for count, turn in enumerate(reversed(turns)):
+        used += sum(estimate_tokens(str(message.get('content', ''))) for message in turn)
+        if used > budget and count:
+            return count
+    return len(turns)
+
+
+def plan_history(messages: List[Dict[str, Any]], summary: str, budget: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split the messages newer than the summary (oldest first) into (window, fold).
+    window: the newest turns that fit in budget tokens next to the summary, sent verbatim.
+    fold: empty until the messages overflow the budget; then the oldest turns, leaving only
+    half the budget unsummarized, so the summary is extended every few turns rather than every turn.
+    A budget of 0 or less keeps the whole history verbatim.
+    """
+    if budget <= 0 or not messages:
+        return messages, []
+
+    available = max(budget - (estimate_tokens(summary) if summary else 0), 0)
+    turns = _turns(messages)
+    kept = _newest_turns(turns, available)
+    window = [message for turn in turns[-kept:] for message in turn]
+    if kept == len(turns):
+        return window, []
+
+    folded = len(turns) - _newest_turns(turns, available // 2)
+    fold = [message for turn in turns[:folded] for message in turn]
+    return window, fold
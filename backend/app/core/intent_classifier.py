@@ -0,0 +1,237 @@
+from app.core.config import settings
+from app.core.llm import VALID_INTENTS
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Explicit requests only, checked in intent priority order (Escalation wins over Transactional).
+# A hit skips Gemini at confidence 1.0, so anything that could be a question about the topic
+# ("what is your escalation policy?") must not match.
+RULES: List[Tuple[str, re.Pattern]] = [
+    ('Escalation', re.compile(
+        r"\b(speak|talk|chat)\s+(to|with)\s+(a\s+|an\s+|your\s+)?(human|person|manager|supervisor|agent|someone)\b"
+        r"|\bescalate\s+(this|me|my|it)\b"
+        r"|\b(want|need)\s+(a\s+)?(real|live)\s+(person|human|agent)\b"
+        r"|\b(transfer|hand\s*off)\s+(me|this)\b"
+        r"|\braise\s+a\s+ticket\b"
+    )),
+    ('Transactional', re.compile(
+        r"\bwhere\s+is\s+my\s+(order|package|parcel|delivery|refund)\b"
+        r"|\b(track|cancel|change|update)\s+(my|this)\s+(order|booking|address|delivery|subscription)\b"
+        r"|\b(refund|return)\s+(my|this)\s+(order|item|purchase|package|parcel)\b"
+        r"|\b(apply|use)\s+(my|this)\s+(discount|coupon|promo)\b"
+        r"|\b(want|get)\s+my\s+money\s+back\b"
+    )),
+]
+
+# How-to and policy questions ("how do I return...", "can I talk to...") go to Gemini even when
+# they mention a rule phrase
+QUESTION_PREFIX = re.compile(r"^\s*(how|what|why|when|which|who|is|are|does|do\s+you|do\s+i|can\s+i|could\s+i)\b")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _features(text: str) -> List[str]:
+    """Unigrams and bigrams of a lowercased query"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+def _tfidf(text: str, idf: Dict[str, float]) -> Dict[str, float]:
+    """L2-normalised TF-IDF vector over the known vocabulary"""
+    counts: Dict[str, int] = {}
+    for feature in _features(text):
+        if feature in idf:
+            counts[feature] = counts.get(feature, 0) + 1
+    vector = {feature: count * idf[feature] for feature, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+
+
+def _softmax(scores: Dict[str, float]) -> Dict[str, float]:
+    top = max(scores.values())
+    exps = {label: math.exp(score - top) for label, score in scores.items()}
+    total = sum(exps.values())
+    return {label: value / total for label, value in exps.items()}
+
+
+def _predict(model: Dict[str, Any], vector: Dict[str, float]) -> Dict[str, float]:
+    scores = {
+        label: model['bias'][label] + sum(model['weights'][label].get(feature, 0.0) * weight for feature, weight in vector.items())
+        for label in model['classes']
+    }
+    return _softmax(scores)
+
+
+def train_model(examples: List[Tuple[str, str]], epochs: int = 30, learning_rate: float = 0.5,
+                min_df: int = 2, holdout: float = 0.1) -> Dict[str, Any]:
+    """
+    Fit a multinomial logistic regression over TF-IDF features with plain SGD.
+    A random holdout slice is kept out of training to report accuracy.
+    """
+    examples = list(examples)
+    random.Random(42).shuffle(examples)
+    held_out = examples[:int(len(examples) * holdout)]
+    training = examples[len(held_out):]
+
+    document_frequency: Dict[str, int] = {}
+    for text, _ in training:
+        for feature in set(_features(text)):
+            document_frequency[feature] = document_frequency.get(feature, 0) + 1
+    total = len(training)
+    idf = {
+        feature: math.log((1 + total) / (1 + count)) + 1
+        for feature, count in document_frequency.items() if count >= min_df
+    }
+
+    classes = sorted({label for _, label in training})
+    model: Dict[str, Any] = {
+        'classes': classes,
+        'idf': idf,
+        'weights': {label: {} for label in classes},
+        'bias': {label: 0.0 for label in classes},
+    }
+    vectors = [(_tfidf(text, idf), label) for text, label in training]
+    rng = random.Random(7)
+    for epoch in range(epochs):
+        rng.shuffle(vectors)
+        step = learning_rate / (1 + epoch * 0.1)
+        for vector, label in vectors:
+            probabilities = _predict(model, vector)
+            for cls in classes:
+                gradient = probabilities[cls] - (1.0 if cls == label else 0.0)
+                model['bias'][cls] -= step * gradient
+                weights = model['weights'][cls]
+                for feature, weight in vector.items():
+                    weights[feature] = weights.get(feature, 0.0) - step * gradient * weight
+
+    correct = 0
+    for text, label in held_out:
+        probabilities = _predict(model, _tfidf(text, idf))
+        correct += max(probabilities, key=probabilities.get) == label
+    model.update({
+        'trained_at': datetime.now().isoformat(),
+        'examples': len(training),
+        'holdout_examples': len(held_out),
+        'holdout_accuracy': round(correct / len(held_out), 3) if held_out else None,
+    })
+    return model
+
+
+class IntentClassifier:
+    """
+    Local fast path in front of the Gemini classifier: a compiled rule set, then a small
+    TF-IDF/logistic model trained from labelled Messages. A result is only returned when
+    it clears INTENT_FAST_PATH_THRESHOLD; everything else falls through to the LLM.
+    """
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.model: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'rule_hits': 0, 'model_hits': 0, 'fallthroughs': 0,
+            'shadow_checks': 0, 'shadow_agreements': 0,
+        }
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the trained model from disk; rules keep working without one"""
+        try:
+            with open(self.model_path, encoding='utf-8') as f:
+                self.model = json.load(f)
+            logger.info(
+                f"Loaded intent model from {self.model_path} "
+                f"({self.model.get('examples')} examples, holdout accuracy {self.model.get('holdout_accuracy')})"
+            )
+            return True
+        except FileNotFoundError:
+            logger.info(f"No intent model at {self.model_path}; using rules only")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to load intent model: {str(e)}")
+            return False
+
+    def save(self, model: Dict[str, Any]):
+        """Atomically write a trained model and start using it"""
+        tmp_path = f"{self.model_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(model, f)
+        os.replace(tmp_path, self.model_path)
+        self.model = model
+
+    @staticmethod
+    def match_rules(query: str) -> Optional[str]:
+        lowered = query.lower()
+        if QUESTION_PREFIX.match(lowered):
+            return None
+        for intent, pattern in RULES:
+            if pattern.search(lowered):
+                return intent
+        return None
+
+    def classify(self, query: str) -> Optional[Tuple[str, float]]:
+        """(intent, confidence) when the local stage is sure enough, otherwise None"""
+        intent = self.match_rules(query)
+        if intent:
+            with self._lock:
+                self._stats['rule_hits'] += 1
+            return intent, 1.0
+
+        model = self.model
+        if model:
+            vector = _tfidf(query, model['idf'])
+            if vector:
+                probabilities = _predict(model, vector)
+                intent = max(probabilities, key=probabilities.get)
+                if probabilities[intent] >= settings.INTENT_FAST_PATH_THRESHOLD and intent in VALID_INTENTS:
+                    with self._lock:
+                        self._stats['model_hits'] += 1
+                    return intent, round(probabilities[intent], 3)
+
+        with self._lock:
+            self._stats['fallthroughs'] += 1
+        return None
+
+    def should_shadow(self) -> bool:
+        """Whether to double-check this fast-path answer with the LLM"""
+        return random.random() < settings.INTENT_SHADOW_RATE
+
+    def record_shadow(self, fast_intent: str, llm_intent: str):
+        """Record whether the LLM agreed with a fast-path answer"""
+        if llm_intent not in VALID_INTENTS:
+            return
+        with self._lock:
+            self._stats['shadow_checks'] += 1
+            self._stats['shadow_agreements'] += fast_intent == llm_intent
+        if fast_intent != llm_intent:
+            logger.info(f"Fast-path intent {fast_intent} disagreed with LLM intent {llm_intent}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats['rule_hits'] + stats['model_hits']
+        lookups = hits + stats['fallthroughs']
+        model = self.model or {}
+        return {
+            **stats,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'llm_agreement': round(stats['shadow_agreements'] / stats['shadow_checks'], 3) if stats['shadow_checks'] else None,
+            'threshold': settings.INTENT_FAST_PATH_THRESHOLD,
+            'model': {
+                'loaded': bool(model),
+                'trained_at': model.get('trained_at'),
+                'examples': model.get('examples'),
+                'holdout_accuracy': model.get('holdout_accuracy'),
+            },
+        }
+
+# Singleton instance
+intent_classifier = IntentClassifier(settings.INTENT_MODEL_PATH)
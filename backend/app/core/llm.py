@@ -1,20 +1,71 @@
 from google import genai
 from google.genai import types
 from app.core.config import settings
+from app.core.cache import TTLCache, normalize_query
+from app.core.llm_gateway import llm_gateway
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
 import logging
-import time
+import random
 
 logger = logging.getLogger(__name__)
 
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+VALID_INTENTS = ["Informational", "Transactional", "Escalation"]
+
+# Replies returned instead of raising when Gemini is unavailable or fails
+UNAVAILABLE_RESPONSE = "I apologize, but I'm unable to process your request at the moment."
+ERROR_RESPONSE = "I apologize, but I encountered an error while processing your request."
+FALLBACK_RESPONSES = {UNAVAILABLE_RESPONSE, ERROR_RESPONSE}
+
+INTENT_RULES = """Rules (highest priority first):
+- If the user explicitly asks to escalate, speak to a human/manager/agent, or requests to transfer/hand off/raise a ticket, classify as Escalation.
+- Otherwise if the user wants an action performed (check status, process refund, change booking, etc.), classify as Transactional.
+- Otherwise, classify as Informational."""
+
+CLASSIFY_PROMPT = """You are an intent classifier. Return exactly one of: Escalation, Transactional, Informational.
+
+{rules}
+
+User query: {query}
+
+Respond with only the single word: Escalation, Transactional, or Informational."""
+
+class TurnResult(BaseModel):
+    """Structured output of the single-call classify-and-answer mode"""
+    intent: str
+    confidence: float
+    answer: str = ""
+
 class LLMService:
     def __init__(self):
         self.client = None
         self.gk_model_id = 'gemini-2.5-flash'
+        # Normalized query -> intent; keys carry a hash of the prompt and model so edits invalidate them
+        self.intent_cache = TTLCache(settings.INTENT_CACHE_MAX_ENTRIES, settings.INTENT_CACHE_TTL_SECONDS)
+        self._classify_version = hashlib.sha256(
+            f"{self.gk_model_id}\n{CLASSIFY_PROMPT}\n{INTENT_RULES}".encode()
+        ).hexdigest()[:12]
         self._initialize_client()
 
     def _initialize_client(self):
         """Initialize Gemini client"""
         try:
+            if settings.LLM_BACKEND == "fake":
+                from app.core.fake_llm import FakeGeminiClient
+                self.client = FakeGeminiClient(
+                    settings.FAKE_LLM_LATENCY_MEDIAN_MS,
+                    settings.FAKE_LLM_LATENCY_P99_MS,
+                    settings.FAKE_LLM_ERROR_RATE,
+                    settings.FAKE_LLM_SCRIPT_PATH,
+                )
+                logger.warning("Using the offline fake LLM instead of Gemini")
+                return
+
             if not settings.GEMINI_API_KEY:
                 logger.warning("GEMINI_API_KEY not set")
                 return
@@ -24,12 +75,66 @@ class LLMService:
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {str(e)}")
 
-    async def generate_response(self, prompt: str) -> str:
+    def _intent_cache_key(self, query: str) -> str:
+        return f"{self._classify_version}:{normalize_query(query)}"
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        status_code = getattr(error, "code", None) or getattr(error, "status_code", None)
+        return status_code in RETRYABLE_STATUS_CODES or "503" in str(error)
+
+    async def _call(self, make_request: Callable[[], Awaitable[Any]], timeout: float,
+                    key: Optional[str] = None) -> Any:
+        """
+        Await a Gemini request through the shared gateway, under a deadline that covers queueing
+        and every attempt, retrying transient errors with full-jitter exponential backoff.
+        Concurrent calls with the same key share one request. Cancelling the caller cancels the HTTP request.
+        """
+        return await llm_gateway.coalesce(key, lambda: self._attempts(make_request, timeout))
+
+    async def _attempts(self, make_request: Callable[[], Awaitable[Any]], timeout: float, hold: bool = False) -> Any:
+        """Retry loop of _call; with hold, returns (result, release) and keeps the gateway slot until release()"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        attempt = 0
+        while True:
+            try:
+                if hold:
+                    return await llm_gateway.attempt_held(make_request, deadline, self._is_retryable)
+                return await llm_gateway.attempt(make_request, deadline, self._is_retryable)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Gemini call exceeded its {timeout}s deadline")
+            except Exception as e:
+                attempt += 1
+                if not self._is_retryable(e) or attempt >= settings.LLM_MAX_ATTEMPTS:
+                    raise
+                delay = random.uniform(
+                    0, min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+                )
+                if loop.time() + delay >= deadline:
+                    raise
+                logger.info(f"Transient Gemini error ({e}). Retrying attempt {attempt}/{settings.LLM_MAX_ATTEMPTS} in {delay:.2f}s...")
+                await asyncio.sleep(delay)
+
+    async def _generate(self, contents: Any, config: types.GenerateContentConfig, timeout: float) -> Any:
+        """generate_content through _call, coalescing identical model/config/contents requests"""
+        key = hashlib.sha256(f"{self.gk_model_id}\n{config!r}\n{contents!r}".encode()).hexdigest()
+        return await self._call(
+            lambda: self.client.aio.models.generate_content(
+                model=self.gk_model_id,
+                contents=contents,
+                config=config,
+            ),
+            timeout,
+            key=key,
+        )
+
+    async def generate_response(self, prompt: str, timeout: Optional[float] = None) -> str:
         """Generate a response using Gemini"""
         try:
             if not self.client:
                 logger.error("Gemini client not initialized")
-                return "I apologize, but I'm unable to process your request at the moment."
+                return UNAVAILABLE_RESPONSE
 
             logger.info("Generating response from Gemini")
             
@@ -38,42 +143,46 @@ class LLMService:
                 max_output_tokens=1000,
             )
             
-            response = self.client.models.generate_content(
-                model=self.gk_model_id,
-                contents=prompt,
-                config=config
-            )
+            response = await self._generate(prompt, config, timeout or settings.LLM_TIMEOUT_SECONDS)
             
             return response.text
         except Exception as e:
             logger.error(f"Error generating response from Gemini: {str(e)}")
-            return "I apologize, but I encountered an error while processing your request."
+            return ERROR_RESPONSE
 
-    def _build_history(self, conversation_history):
+    def build_history(self, conversation_history):
         """
         Convert internal conversation history to Gemini chat history.
-        Expects a list of dicts with 'role' and 'content'.
+        Expects a list of dicts with 'role' and 'content'; already converted Content passes through.
         """
         history = []
         for entry in conversation_history:
+            if isinstance(entry, types.Content):
+                history.append(entry)
+                continue
             role = entry.get("role", "").lower()
             content = (entry.get("content") or "").strip()
             if not content:
                 continue
 
-            if role == "user":
+            if role == "summary":
+                # Rolling summary of turns no longer sent verbatim, acknowledged so roles keep alternating
+                history.append(types.Content(role="user", parts=[types.Part(text=f"Summary of our conversation so far:\n{content}")]))
+                history.append(types.Content(role="model", parts=[types.Part(text="Understood.")]))
+            elif role == "user":
                 history.append(types.Content(role="user", parts=[types.Part(text=content)]))
             else:
                 # Treat any non-user as model/assistant
                 history.append(types.Content(role="model", parts=[types.Part(text=content)]))
         return history
 
-    async def generate_response_with_history(self, agent, conversation_history, query: str) -> str:
+    async def generate_response_with_history(self, agent, conversation_history, query: str,
+                                             timeout: Optional[float] = None) -> str:
         """Generate a response using Gemini chat history for follow-ups."""
         try:
             if not self.client:
                 logger.error("Gemini client not initialized")
-                return "I apologize, but I'm unable to process your request at the moment."
+                return UNAVAILABLE_RESPONSE
 
             config = types.GenerateContentConfig(
                 temperature=0.7,
@@ -81,107 +190,206 @@ class LLMService:
                 system_instruction=agent.system_instructions if agent else None
             )
 
-            history = self._build_history(conversation_history or [])
+            history = self.build_history(conversation_history or [])
 
-            # If we have history, use chats.create with history; otherwise fallback to generate_content
+            # If we have history, send it with the new message (what a chat session's send_message does,
+            # without building a session object per turn); otherwise send the prompt directly
             if history:
-                logger.info("Creating chat session with history. Messages=%s", len(history))
-                chat = self.client.chats.create(
-                    model=self.gk_model_id,
-                    config=config,
-                    history=history,
-                )
-
-                max_retries = 3
-                attempt = 0
-                last_error = None
-                while attempt < max_retries:
-                    try:
-                        response = chat.send_message(query)
-                        return getattr(response, "text", str(response))
-                    except Exception as e:
-                        last_error = e
-                        status_code = getattr(e, "status_code", None)
-                        if status_code == 503 or "503" in str(e):
-                            attempt += 1
-                            logger.info(f"Received 503 error. Retrying attempt {attempt}/{max_retries}...")
-                            time.sleep(1)
-                            continue
-                        raise
-                logger.error(f"Failed to send message after retries: {last_error}")
-                return "I apologize, but I encountered an error while processing your request."
+                logger.info("Sending prompt with chat history. Messages=%s", len(history))
+                contents = history + [types.Content(role="user", parts=[types.Part(text=query)])]
+                response = await self._generate(contents, config, timeout or settings.LLM_TIMEOUT_SECONDS)
+                return getattr(response, "text", str(response))
             else:
                 logger.info("No conversation history found. Sending prompt directly.")
                 prompt = f"{agent.system_instructions if agent else ''}\nUser: {query}"
-                max_retries = 3
-                attempt = 0
-                last_error = None
-                while attempt < max_retries:
-                    try:
-                        response = self.client.models.generate_content(
-                            model=self.gk_model_id,
-                            contents=prompt,
-                            config=config,
-                        )
-                        return response.text
-                    except Exception as e:
-                        last_error = e
-                        status_code = getattr(e, "status_code", None)
-                        if status_code == 503 or "503" in str(e):
-                            attempt += 1
-                            logger.info(f"Received 503 error. Retrying attempt {attempt}/{max_retries}...")
-                            time.sleep(1)
-                            continue
-                        raise
-                logger.error(f"Failed to send message after retries: {last_error}")
-                return "I apologize, but I encountered an error while processing your request."
+                response = await self._generate(prompt, config, timeout or settings.LLM_TIMEOUT_SECONDS)
+                return response.text
         except Exception as e:
             logger.error(f"Error generating response with history from Gemini: {str(e)}")
-            return "I apologize, but I encountered an error while processing your request."
+            return ERROR_RESPONSE
 
-    async def classify_intent(self, query: str) -> str:
+    async def stream_response_with_history(self, agent, conversation_history, query: str,
+                                           timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream the reply chunk by chunk. Transient errors are retried only until the first
+        chunk arrives; afterwards the deadline applies to each chunk so a stalled stream ends.
+        The stream holds a gateway slot until it finishes.
+        """
+        if not self.client:
+            logger.error("Gemini client not initialized")
+            yield UNAVAILABLE_RESPONSE
+            return
+
+        config = types.GenerateContentConfig(
+            temperature=0.7,
+            max_output_tokens=1000,
+            system_instruction=agent.system_instructions if agent else None
+        )
+        contents = self.build_history(conversation_history or [])
+        contents.append(types.Content(role="user", parts=[types.Part(text=query)]))
+        timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+
+        async def open_stream():
+            # The SDK sends the request on the first __anext__, so the attempt must include it
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.gk_model_id,
+                contents=contents,
+                config=config,
+            )
+            iterator = stream.__aiter__()
+            try:
+                return await iterator.__anext__(), iterator
+            except StopAsyncIteration:
+                return None, iterator
+
+        streamed = False
+        try:
+            (chunk, iterator), release = await self._attempts(open_stream, timeout, hold=True)
+            try:
+                while chunk is not None:
+                    text = getattr(chunk, "text", None)
+                    if text:
+                        streamed = True
+                        yield text
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+                    except StopAsyncIteration:
+                        chunk = None
+            except Exception as e:
+                release(e)
+                raise
+            finally:
+                release()
+        except Exception as e:
+            logger.error(f"Error streaming response from Gemini: {str(e)}")
+            if not streamed:
+                yield ERROR_RESPONSE
+
+    async def summarize_history(self, summary: str, messages: List[Dict[str, Any]],
+                                timeout: Optional[float] = None) -> Optional[str]:
+        """Extend a rolling conversation summary with older messages; None on failure"""
+        try:
+            if not self.client:
+                logger.error("Gemini client not initialized")
+                return None
+
+            transcript = "\n".join(
+                f"{'User' if message.get('role') == 'user' else 'Assistant'}: {message.get('content', '')}"
+                for message in messages
+            )
+            prompt = f"""You maintain a running summary of a customer-support conversation.
+Update the summary with the new messages. Keep names, order numbers, dates, what the user asked for,
+what was done or promised, and anything still unresolved. Drop pleasantries. Write at most
+{settings.HISTORY_SUMMARY_MAX_TOKENS * 3 // 4} words of plain prose.
+
+Current summary:
+{summary or '(none)'}
+
+New messages:
+{transcript}
+
+Updated summary:"""
+
+            config = types.GenerateContentConfig(
+                temperature=0.2,
+                max_output_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+            )
+            response = await self._generate(prompt, config, timeout or settings.LLM_TIMEOUT_SECONDS)
+            return (response.text or "").strip() or None
+        except Exception as e:
+            logger.error(f"Error summarizing conversation history: {str(e)}")
+            return None
+
+    async def classify_intent(self, query: str, timeout: Optional[float] = None) -> str:
         """Classify user intent using Gemini"""
         try:
             if not self.client:
                 logger.error("Gemini client not initialized")
                 return "Error"
 
+            cache_key = self._intent_cache_key(query)
+            cached = self.intent_cache.get(cache_key)
+            if cached:
+                logger.info(f"Intent cache hit: {cached}")
+                return cached
+
             logger.info("Classifying intent with Gemini")
             
-            prompt = f"""You are an intent classifier. Return exactly one of: Escalation, Transactional, Informational.
-
-Rules (highest priority first):
-- If the user explicitly asks to escalate, speak to a human/manager/agent, or requests to transfer/hand off/raise a ticket, classify as Escalation.
-- Otherwise if the user wants an action performed (check status, process refund, change booking, etc.), classify as Transactional.
-- Otherwise, classify as Informational.
-
-User query: {query}
-
-Respond with only the single word: Escalation, Transactional, or Informational."""
+            prompt = CLASSIFY_PROMPT.format(rules=INTENT_RULES, query=query)
 
             config = types.GenerateContentConfig(
                 temperature=0.0,
                 max_output_tokens=50,
             )
             
-            response = self.client.models.generate_content(
-                model=self.gk_model_id,
-                contents=prompt,
-                config=config
-            )
+            response = await self._generate(prompt, config, timeout or settings.LLM_CLASSIFY_TIMEOUT_SECONDS)
             
             intent_text = (response.text or "").strip()
             intent = intent_text if intent_text else "Informational"
             
             # Validate intent
-            valid_intents = ["Informational", "Transactional", "Escalation"]
-            if intent not in valid_intents:
+            if intent not in VALID_INTENTS:
                 logger.warning(f"Invalid intent '{intent}', defaulting to Informational")
                 return "Informational"
             
+            self.intent_cache.set(cache_key, intent)
             return intent
         except Exception as e:
             logger.error(f"Error classifying intent: {str(e)}")
             return "Error"
 
+    async def classify_and_respond(self, agent, conversation_history, query: str,
+                                   timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Classify the query and answer it in one call with JSON output.
+        Returns {'intent', 'confidence', 'answer'}, or None so callers can fall back to the two-call path.
+        """
+        try:
+            if not self.client:
+                logger.error("Gemini client not initialized")
+                return None
+
+            logger.info("Classifying and answering with one Gemini call")
+            instructions = f"""{agent.system_instructions if agent else ''}
+
+Before answering, classify the latest user message as exactly one of: Escalation, Transactional, Informational.
+
+{INTENT_RULES}
+
+Respond with JSON:
+- intent: the classification.
+- confidence: 0.0-1.0, how confident you are that the classification is right and, for Informational, that your answer fully and correctly resolves the question.
+- answer: for Informational, your reply to the user; otherwise an empty string."""
+
+            config = types.GenerateContentConfig(
+                temperature=0.3,
+                max_output_tokens=1000,
+                system_instruction=instructions,
+                response_mime_type="application/json",
+                response_schema=TurnResult,
+            )
+            contents = self.build_history(conversation_history or [])
+            contents.append(types.Content(role="user", parts=[types.Part(text=query)]))
+
+            response = await self._generate(contents, config, timeout or settings.LLM_TIMEOUT_SECONDS)
+
+            result = response.parsed if isinstance(response.parsed, TurnResult) else TurnResult.model_validate_json(response.text or "")
+            if result.intent not in VALID_INTENTS:
+                logger.warning(f"Invalid intent '{result.intent}' in structured output")
+                return None
+            if result.intent == "Informational" and not result.answer.strip():
+                logger.warning("Structured output has no answer for an Informational query")
+                return None
+            return {
+                'intent': result.intent,
+                'confidence': min(max(result.confidence, 0.0), 1.0),
+                'answer': result.answer,
+            }
+        except ValidationError as e:
+            logger.warning(f"Unparseable structured output from Gemini: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Error in combined classify-and-answer call: {str(e)}")
+            return None
+
 llm_service = LLMService()
@@ -0,0 +1,241 @@
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+
+class TokenBucket:
+    """Requests per second with bursts up to capacity; rate 0 disables the limit"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive upstream failures (timeouts, 429s, 5xx) and fails
+    calls fast for reset_seconds. Then one probe call is let through (half-open): success closes
+    the breaker, failure opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            logger.info("Gemini circuit breaker half-open; sending a probe request")
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError("Gemini circuit breaker is open")
+
+    def release_probe(self):
+        """Let another probe through when the probe call never reached Gemini"""
+        self._probing = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Gemini circuit breaker closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and 0 < self.failure_threshold <= self.consecutive_failures
+        ):
+            logger.warning(f"Gemini circuit breaker open after {self.consecutive_failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'open_for_seconds': round(time.monotonic() - self.opened_at, 1) if self.state != self.CLOSED else 0.0,
+            'rejected': self.rejected,
+        }
+
+
+class LLMGateway:
+    """
+    Admission control shared by every Gemini call of the process: a concurrency limit and a
+    token-bucket rate limit in front of each attempt, a circuit breaker that fails fast while
+    Gemini is unhealthy, and coalescing of identical in-flight requests into one upstream call.
+    Used from the event loop only.
+    """
+    def __init__(self, max_concurrency: int, rate: float, burst: float,
+                 failure_threshold: int, reset_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._inflight: Dict[Hashable, List[Any]] = {}
+        self._stats = {'calls': 0, 'coalesced': 0, 'queued': 0, 'in_flight': 0}
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Semaphore for the running event loop (test clients may start several loops)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(max(self.max_concurrency, 1))
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def attempt(self, make_request: Callable[[], Awaitable[Any]], deadline: float,
+                      is_failure: Callable[[Exception], bool]) -> Any:
+        """
+        One upstream attempt, admitted by the breaker, rate limit and concurrency limit.
+        Time spent queued counts against deadline (a loop.time() value).
+        """
+        result, release = await self.attempt_held(make_request, deadline, is_failure)
+        release()
+        return result
+
+    async def attempt_held(self, make_request: Callable[[], Awaitable[Any]], deadline: float,
+                           is_failure: Callable[[Exception], bool]) -> Tuple[Any, Callable[..., None]]:
+        """
+        Like attempt, but on success the concurrency slot stays taken until the returned
+        release(error=None) is called, for responses that keep streaming after make_request
+        returns. Passing the error that ended the stream counts it against the breaker.
+        """
+        self.breaker.before_call()
+        loop = asyncio.get_running_loop()
+        semaphore = self._limit()
+        self._stats['queued'] += 1
+        try:
+            async with asyncio.timeout_at(deadline):
+                await self.bucket.acquire()
+                await semaphore.acquire()
+        except BaseException:
+            # A call that never went upstream says nothing about Gemini's health
+            self.breaker.release_probe()
+            raise
+        finally:
+            self._stats['queued'] -= 1
+
+        self._stats['calls'] += 1
+        self._stats['in_flight'] += 1
+        released = False
+
+        def release(error: Optional[BaseException] = None):
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._stats['in_flight'] -= 1
+            semaphore.release()
+            if isinstance(error, asyncio.TimeoutError) or (isinstance(error, Exception) and is_failure(error)):
+                self.breaker.record_failure()
+
+        try:
+            result = await asyncio.wait_for(make_request(), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            release()
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            release()
+            self.breaker.release_probe()
+            raise
+        except Exception as e:
+            release()
+            if is_failure(e):
+                self.breaker.record_failure()
+            else:
+                # A rejected request still shows the upstream answering
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            release()
+            raise
+        self.breaker.record_success()
+        return result, release
+
+    async def coalesce(self, key: Optional[Hashable], run: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await run(), sharing one execution between callers with the same key. The shared call is
+        cancelled only when every caller waiting on it has been cancelled.
+        """
+        if key is None:
+            return await run()
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(run())
+            entry = [task, 0]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _, key=key, entry=entry: (
+                self._inflight.pop(key, None) if self._inflight.get(key) is entry else None
+            ))
+        else:
+            self._stats['coalesced'] += 1
+            logger.info("Coalescing identical in-flight Gemini request")
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'coalescing': len(self._inflight),
+            'max_concurrency': self.max_concurrency,
+            'rate_limit_per_second': self.bucket.rate,
+            'rate_tokens_available': round(self.bucket.available(), 2) if self.bucket.rate > 0 else None,
+            'breaker': self.breaker.stats(),
+        }
+
+# Singleton instance
+llm_gateway = LLMGateway(
+    settings.LLM_MAX_CONCURRENCY,
+    settings.LLM_RATE_LIMIT_PER_SECOND,
+    settings.LLM_RATE_LIMIT_BURST,
+    settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    settings.LLM_BREAKER_RESET_SECONDS,
+)
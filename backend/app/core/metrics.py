@@ -0,0 +1,68 @@
+from app.core.config import settings
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Sequence
+import math
+import threading
+import time
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples (0.0 when there are none)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, Any]:
+    """Count and latency percentiles (milliseconds) of samples in seconds"""
+    return {
+        'count': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 1),
+        'p95_ms': round(percentile(samples, 95) * 1000, 1),
+        'p99_ms': round(percentile(samples, 99) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1) if samples else 0.0,
+    }
+
+
+class StageMetrics:
+    """Latest wall-clock durations per chat pipeline stage, bounded per stage, with percentile summaries"""
+    def __init__(self, max_samples: int):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=max(self.max_samples, 1))
+            samples.append(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Record how long the with-block took, including awaits inside it"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def samples(self, stage: str) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(stage, ()))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+        return {stage: summarize(samples) for stage, samples in snapshot.items()}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+# Singleton instance
+stage_metrics = StageMetrics(settings.STAGE_METRICS_MAX_SAMPLES)
@@ -0,0 +1,200 @@
+from app.core.config import settings
+from app.core.storage import db
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _source() -> str:
+    """Identifies the store the counts describe, so a checkpoint of another store is not reused"""
+    if db.name == 'sqlite':
+        return f"sqlite:{os.path.abspath(settings.SQLITE_DB_PATH)}"
+    return f"{db.name}:{settings.GOOGLE_SPREADSHEET_ID}"
+
+
+class QueryCounters:
+    """
+    Running query counts (total, escalated) per agent, updated as chat turns are written, so
+    metric reads don't scan Messages.
+
+    Counts are checkpointed to a local JSON file together with a watermark (newest message
+    timestamp counted). On startup the checkpoint is loaded and only messages from the
+    watermark on are read; without a usable checkpoint, or on reconcile, Messages are
+    rescanned in full. Turns recorded while a scan is running are merged afterwards by
+    message_id, so none are lost or counted twice.
+    """
+    def __init__(self, path: str, checkpoint_interval: float):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.Lock()
+        self._load_lock = threading.RLock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._watermark = ''
+        self._watermark_ids: set = set()
+        self._loaded = False
+        # Rows recorded before the first load or while a scan is running; None otherwise
+        self._pending: Optional[List[Dict[str, Any]]] = []
+        self._dirty = False
+        self._last_checkpoint = time.monotonic()
+        self.last_rebuild: Dict[str, Any] = {}
+
+    def _apply(self, state: Tuple[Dict[str, Dict[str, int]], Dict[str, Any]], row: Dict[str, Any]):
+        """Count one Messages row into (counts, watermark state)"""
+        counts, mark = state
+        agent = counts.setdefault(str(row.get('agent_id', '')), {'total_queries': 0, 'escalated_queries': 0})
+        if row.get('role') == 'user':
+            agent['total_queries'] += 1
+        if row.get('escalated') == 'TRUE':
+            agent['escalated_queries'] += 1
+        timestamp = str(row.get('timestamp', ''))
+        if timestamp > mark['watermark']:
+            mark['watermark'] = timestamp
+            mark['ids'] = {str(row.get('message_id', ''))}
+        elif timestamp == mark['watermark']:
+            mark['ids'].add(str(row.get('message_id', '')))
+
+    def record(self, rows: List[Dict[str, Any]]):
+        """Count Messages rows as they are written"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(rows)
+            if self._loaded:
+                state = (self._counts, {'watermark': self._watermark, 'ids': self._watermark_ids})
+                for row in rows:
+                    self._apply(state, row)
+                self._watermark, self._watermark_ids = state[1]['watermark'], state[1]['ids']
+                self._dirty = True
+        if self._loaded and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def _read_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable analytics checkpoint {self.path}: {str(e)}")
+            return None
+        if checkpoint.get('source') != _source():
+            logger.info("Analytics checkpoint belongs to another store; rescanning Messages")
+            return None
+        return checkpoint
+
+    def checkpoint(self) -> bool:
+        """Atomically write the counts and watermark, if they changed since the last checkpoint"""
+        with self._lock:
+            self._last_checkpoint = time.monotonic()
+            if not self.path or not self._loaded or not self._dirty:
+                return False
+            snapshot = {
+                'source': _source(),
+                'watermark': self._watermark,
+                'watermark_ids': sorted(self._watermark_ids),
+                'agents': {agent_id: dict(counts) for agent_id, counts in self._counts.items()},
+            }
+            self._dirty = False
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing analytics checkpoint: {str(e)}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def _rebuild(self, use_checkpoint: bool) -> Dict[str, Any]:
+        """Recount from the checkpoint plus newer messages, or from every message"""
+        with self._load_lock:
+            started = time.perf_counter()
+            with self._lock:
+                if self._pending is None:
+                    self._pending = []
+            try:
+                checkpoint = self._read_checkpoint() if use_checkpoint else None
+                if checkpoint:
+                    counts = {agent_id: dict(c) for agent_id, c in checkpoint['agents'].items()}
+                    mark = {'watermark': checkpoint['watermark'], 'ids': set(checkpoint['watermark_ids'])}
+                    rows = db.get_all_rows('Messages', since=mark['watermark'] or None)
+                else:
+                    counts, mark = {}, {'watermark': '', 'ids': set()}
+                    rows = db.get_all_rows('Messages')
+                # Rows at the watermark may already be in the checkpoint
+                counted = set(mark['ids'])
+                state = (counts, mark)
+                for row in rows:
+                    message_id = str(row.get('message_id', ''))
+                    if message_id in counted:
+                        continue
+                    counted.add(message_id)
+                    self._apply(state, row)
+            except Exception:
+                with self._lock:
+                    if self._loaded:
+                        self._pending = None
+                raise
+
+            with self._lock:
+                for row in self._pending:
+                    if str(row.get('message_id', '')) not in counted:
+                        self._apply(state, row)
+                self._pending = None
+                self._counts, self._watermark, self._watermark_ids = counts, mark['watermark'], mark['ids']
+                self._loaded = True
+                self._dirty = True
+            self.last_rebuild = {
+                'source': 'checkpoint' if checkpoint else 'full_scan',
+                'rows_scanned': len(rows),
+                'seconds': round(time.perf_counter() - started, 3),
+            }
+        logger.info(f"Analytics counters rebuilt from {self.last_rebuild['source']} "
+                    f"({len(rows)} messages read in {self.last_rebuild['seconds']}s)")
+        self.checkpoint()
+        return self.last_rebuild
+
+    def load(self) -> Dict[str, Any]:
+        """Startup: resume from the checkpoint when there is one (no-op once loaded)"""
+        with self._load_lock:
+            if self._loaded:
+                return self.last_rebuild
+            return self._rebuild(use_checkpoint=True)
+
+    def reconcile(self) -> Dict[str, Any]:
+        """Recount every message, replacing counts that drifted (e.g. writes that failed after being counted)"""
+        return self._rebuild(use_checkpoint=False)
+
+    def get(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+        """Total, escalated and resolved queries with the resolution rate, for one agent or all"""
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            if agent_id is None:
+                total_queries = sum(c['total_queries'] for c in self._counts.values())
+                escalated_queries = sum(c['escalated_queries'] for c in self._counts.values())
+            else:
+                counts = self._counts.get(agent_id, {})
+                total_queries = counts.get('total_queries', 0)
+                escalated_queries = counts.get('escalated_queries', 0)
+        resolved_queries = total_queries - escalated_queries
+        resolution_rate = (resolved_queries / total_queries * 100) if total_queries > 0 else 0.0
+        return {
+            "total_queries": total_queries,
+            "escalated_queries": escalated_queries,
+            "resolved_queries": resolved_queries,
+            "resolution_rate": round(resolution_rate, 1)
+        }
+
+# Singleton instance
+query_counters = QueryCounters(settings.ANALYTICS_COUNTERS_PATH, settings.ANALYTICS_CHECKPOINT_INTERVAL_SECONDS)
@@ -1,22 +1,129 @@
 import gspread
+from gspread.utils import numericise_all, rowcol_to_a1
 from google.oauth2.service_account import Credentials
 from app.core.config import settings
+from app.core.storage_backend import StorageBackend, SCHEMA, PRIMARY_KEYS, FOREIGN_KEYS, TIME_COLUMNS
+import atexit
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
 
 logger = logging.getLogger(__name__)
 
-class GoogleSheetsDB:
+# Written to the first column of deleted rows in sheets that have no status column
+TOMBSTONE = '__deleted__'
+
+# Catalog of monthly partitions: one row per partition worksheet, plus one 'base' row per
+# table recording when it was partitioned (older rows stay in the original worksheet)
+CATALOG_SHEET = 'Partitions'
+CATALOG_HEADERS = ['table', 'partition', 'period', 'created_at']
+BASE_PERIOD = 'base'
+
+class _LayoutLock:
+    """
+    Shared/exclusive lock over sheet row numbers.
+    Writes that target a row number hold it shared; compaction, which moves rows, holds it exclusively.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._holders = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._holders += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._holders -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._exclusive or self._holders:
+                self._cond.wait()
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+class GoogleSheetsDB(StorageBackend):
+    name = 'sheets'
+
     def __init__(self):
         self.client = None
         self.spreadsheet = None
         self.sheets = {}
+        self._headers: Dict[str, List[str]] = {}
+
+        # Write-behind state: rows waiting to be appended and rows currently being appended
+        self.write_behind = settings.SHEETS_WRITE_BEHIND
+        self._pending: Dict[str, List[List[str]]] = {}
+        self._inflight: Dict[str, List[List[str]]] = {}
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+
+        # Tombstone deletes: count of dead rows per sheet, compacted away during quiet periods
+        self._tombstones: Dict[str, int] = {}
+        self._last_write = time.monotonic()
+        self._compact_thread: Optional[threading.Thread] = None
+        self._layout_lock = _LayoutLock()
+        # One direct append per worksheet at a time, so cached records stay in sheet row order
+        self._append_locks: Dict[str, threading.Lock] = {}
+
+        # Read-through table cache: sheet -> {'records', 'loaded_at', 'indexes'} in LRU order.
+        # A record's position in 'records' maps to sheet row position + 2 (header, 1-indexed),
+        # so appends patch the cache in the order the sheet receives them.
+        # Versions are bumped on every local write so a slow load can't overwrite newer data.
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_versions: Dict[str, int] = {}
+        # Completed flushes per sheet: a load that overlapped one may have missed the flushed rows
+        self._flush_counts: Dict[str, int] = {}
+        self._cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'refreshes': 0}
+
+        # Time partitions: table -> {period ('2026_10') -> worksheet}, read from the catalog on first use
+        self.partitioned = [
+            name.strip() for name in settings.SHEETS_PARTITIONED_SHEETS.split(',')
+            if name.strip() in TIME_COLUMNS
+        ]
+        self._partitions: Optional[Dict[str, Dict[str, str]]] = None
+        self._cutovers: Dict[str, str] = {}
+        self._partition_tables: Dict[str, str] = {}
+        self._catalog_lock = threading.Lock()
+
         self._initialize()
+        if self.write_behind:
+            self._start_flusher()
+        if settings.SHEETS_COMPACTION_INTERVAL_SECONDS > 0:
+            self._start_compactor()
+        if self._flush_thread or self._compact_thread:
+            atexit.register(self.close)
 
     def _initialize(self):
         """Initialize Google Sheets connection"""
+        if settings.SHEETS_FAKE:
+            # In-memory spreadsheet for offline runs and load tests
+            from app.core.fake_gspread import FakeClient
+            self.client = FakeClient(settings.SHEETS_FAKE_LATENCY_MS / 1000)
+            self.spreadsheet = self.client.open_by_key(settings.GOOGLE_SPREADSHEET_ID or 'local')
+            logger.warning(f"Using an in-memory fake spreadsheet ({settings.SHEETS_FAKE_LATENCY_MS}ms per API call)")
+            return
         try:
             # Define the scope
             scope = [
@@ -58,144 +165,766 @@ class GoogleSheetsDB:
         try:
             worksheet = self.spreadsheet.worksheet(sheet_name)
             logger.info(f"Found existing sheet: {sheet_name}")
+            existing = worksheet.row_values(1)
+            missing = [header for header in headers if header not in existing]
+            if existing and missing:
+                # Sheets created before a column was added to SCHEMA get it appended on the right
+                if worksheet.col_count < len(existing) + len(missing):
+                    worksheet.add_cols(len(existing) + len(missing) - worksheet.col_count)
+                worksheet.update([existing + missing], 'A1')
+                logger.info(f"Added columns {missing} to sheet: {sheet_name}")
         except gspread.WorksheetNotFound:
             worksheet = self.spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=len(headers))
             worksheet.append_row(headers)
             logger.info(f"Created new sheet: {sheet_name}")
         
         self.sheets[sheet_name] = worksheet
+        self._headers.pop(sheet_name, None)
+        self._invalidate(sheet_name)
         return worksheet
 
+    def _get_worksheet(self, sheet_name: str) -> gspread.Worksheet:
+        """Get a worksheet handle, caching it for later calls"""
+        worksheet = self.sheets.get(sheet_name)
+        if worksheet is None:
+            worksheet = self.spreadsheet.worksheet(sheet_name)
+            self.sheets[sheet_name] = worksheet
+        return worksheet
+
+    def _get_headers(self, sheet_name: str) -> List[str]:
+        """Get the header row of a sheet, read once per process"""
+        headers = self._headers.get(sheet_name)
+        if headers is None:
+            headers = self._get_worksheet(sheet_name).row_values(1)
+            self._headers[sheet_name] = headers
+        return headers
+
+    @staticmethod
+    def _serialize(value: Any) -> str:
+        """Convert a value to the string stored in a cell"""
+        # Convert lists/dicts to JSON strings
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value)
+        return str(value)
+
+    def _to_record(self, headers: List[str], row: List[str]) -> Dict[str, Any]:
+        """Convert a queued row into the same shape get_all_records returns"""
+        return dict(zip(headers, numericise_all(row)))
+
+    def _queued_rows(self, sheet_name: str) -> List[List[str]]:
+        """Rows accepted by insert_row that are not yet confirmed in the sheet"""
+        return self._inflight.get(sheet_name, []) + self._pending.get(sheet_name, [])
+
+    def _invalidate(self, sheet_name: str):
+        """Drop a cached sheet and fence off any load that is in progress"""
+        with self._lock:
+            self._cache.pop(sheet_name, None)
+            self._cache_versions[sheet_name] = self._cache_versions.get(sheet_name, 0) + 1
+
+    def _cached_records(self, sheet_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached records of a sheet if they are still fresh"""
+        with self._lock:
+            entry = self._cache.get(sheet_name)
+            if entry and time.monotonic() - entry['loaded_at'] < settings.SHEETS_CACHE_TTL_SECONDS:
+                self._cache.move_to_end(sheet_name)
+                self._cache_stats['hits'] += 1
+                return entry['records']
+            self._cache_stats['misses'] += 1
+            return None
+
+    def _store_records(self, sheet_name: str, records: List[Dict[str, Any]], version: int):
+        """Cache freshly loaded records and evict least recently used sheets over the row bound"""
+        if settings.SHEETS_CACHE_TTL_SECONDS <= 0 or len(records) > settings.SHEETS_CACHE_MAX_ROWS:
+            return
+        with self._lock:
+            if self._cache_versions.get(sheet_name, 0) != version:
+                # A local write landed while we were reading; this snapshot may miss it
+                return
+            self._cache[sheet_name] = {'records': records, 'loaded_at': time.monotonic(), 'indexes': {}}
+            self._cache.move_to_end(sheet_name)
+            cached_rows = sum(len(entry['records']) for entry in self._cache.values())
+            while cached_rows > settings.SHEETS_CACHE_MAX_ROWS:
+                evicted_name, evicted = self._cache.popitem(last=False)
+                cached_rows -= len(evicted['records'])
+                self._cache_stats['evictions'] += 1
+                logger.debug(f"Evicted {evicted_name} from table cache")
+
+    def _load_records(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """Read every record of a sheet, through the cache"""
+        records = self._cached_records(sheet_name)
+        if records is not None:
+            return records
+
+        # Read-your-writes: rows still queued for a flush are added below. A flush that completes
+        # during the read takes its rows out of the queue, and the read may have missed them
+        # landing, so such a read is repeated.
+        for attempt in range(3):
+            with self._lock:
+                version = self._cache_versions.get(sheet_name, 0)
+                flushes = self._flush_counts.get(sheet_name, 0)
+
+            records = self._get_worksheet(sheet_name).get_all_records()
+
+            with self._lock:
+                queued = self._queued_rows(sheet_name)
+                if self._flush_counts.get(sheet_name, 0) == flushes:
+                    break
+            logger.debug(f"Re-reading {sheet_name}: a flush completed during the read")
+
+        # A row that was appended while we were reading is already in records,
+        # so skip anything whose first (key) column we have seen.
+        if queued:
+            headers = self._get_headers(sheet_name)
+            seen = {str(record.get(headers[0])) for record in records}
+            records.extend(
+                self._to_record(headers, row) for row in queued if row[0] not in seen
+            )
+
+        with self._lock:
+            self._tombstones[sheet_name] = sum(1 for record in records if self._is_tombstone(record))
+        self._store_records(sheet_name, records, version)
+        return records
+
+    def _indexed_columns(self, sheet_name: str) -> List[str]:
+        """Columns of a sheet (or of the table a partition belongs to) that get a hash index"""
+        table = self._partition_tables.get(sheet_name, sheet_name)
+        primary = PRIMARY_KEYS.get(table)
+        return ([primary] if primary else []) + FOREIGN_KEYS.get(table, [])
+
+    def _positions(self, sheet_name: str, records: List[Dict[str, Any]], key: str, value: Any) -> List[int]:
+        """Positions of matching records, via the hash index when the records are cached (call under lock)"""
+        entry = self._cache.get(sheet_name)
+        if entry is not None and entry['records'] is records and key in self._indexed_columns(sheet_name):
+            index = entry['indexes'].get(key)
+            if index is None:
+                index = {}
+                for pos, record in enumerate(records):
+                    index.setdefault(str(record.get(key)), []).append(pos)
+                entry['indexes'][key] = index
+                logger.debug(f"Built {sheet_name}.{key} index over {len(records)} rows")
+            return [pos for pos in index.get(str(value), []) if not self._is_tombstone(records[pos])]
+        return [
+            pos for pos, record in enumerate(records)
+            if str(record.get(key)) == str(value) and not self._is_tombstone(record)
+        ]
+
+    def _find_records(self, sheet_name: str, key: str, value: Any) -> List[Tuple[int, Dict[str, Any]]]:
+        """(position, record) pairs matching key=value"""
+        records = self._load_records(sheet_name)
+        with self._lock:
+            return [(pos, records[pos]) for pos in self._positions(sheet_name, records, key, value)]
+
+    def _patch_cache(self, sheet_name: str, key: Optional[str] = None, value: Any = None,
+                     updates: Optional[Dict[str, Any]] = None, record: Optional[Dict[str, Any]] = None,
+                     delete: bool = False):
+        """Apply one of our own writes to the cached copy of a sheet (and its indexes) instead of evicting it"""
+        with self._lock:
+            self._cache_versions[sheet_name] = self._cache_versions.get(sheet_name, 0) + 1
+            entry = self._cache.get(sheet_name)
+            if not entry:
+                return
+            records = entry['records']
+            indexes = entry['indexes']
+            if record is not None:
+                records.append(record)
+                for column, index in indexes.items():
+                    index.setdefault(str(record.get(column)), []).append(len(records) - 1)
+                return
+
+            positions = self._positions(sheet_name, records, key, value)
+            if not positions:
+                return
+            pos = positions[0]
+            if delete:
+                # Later rows shift up one position, so indexes are rebuilt on next use
+                del records[pos]
+                indexes.clear()
+                return
+
+            existing = records[pos]
+            for update_key, update_value in updates.items():
+                if update_key not in existing:
+                    continue
+                new_value = numericise_all([self._serialize(update_value)])[0]
+                index = indexes.get(update_key)
+                if index is not None:
+                    index[str(existing[update_key])].remove(pos)
+                    index.setdefault(str(new_value), []).append(pos)
+                existing[update_key] = new_value
+
+    @staticmethod
+    def _period(timestamp: Any) -> str:
+        """Monthly partition key ('2026_10') of an ISO timestamp; the current month if it can't be parsed"""
+        try:
+            return datetime.fromisoformat(str(timestamp)).strftime('%Y_%m')
+        except ValueError:
+            return datetime.now().strftime('%Y_%m')
+
+    def _catalog(self) -> Dict[str, Dict[str, str]]:
+        """Partitions of every partitioned table, read from the catalog sheet once per process"""
+        with self._catalog_lock:
+            if self._partitions is None:
+                worksheet = self._get_or_create_sheet(CATALOG_SHEET, CATALOG_HEADERS)
+                partitions: Dict[str, Dict[str, str]] = {table: {} for table in self.partitioned}
+                for entry in worksheet.get_all_records(numericise_ignore=['all']):
+                    if entry['period'] == BASE_PERIOD:
+                        self._cutovers[entry['table']] = entry['created_at']
+                    else:
+                        partitions.setdefault(entry['table'], {})[entry['period']] = entry['partition']
+                        self._partition_tables[entry['partition']] = entry['table']
+                for table in self.partitioned:
+                    if table not in self._cutovers:
+                        # Everything already in the base worksheet predates this moment
+                        cutover = datetime.now().isoformat()
+                        worksheet.append_row([table, table, BASE_PERIOD, cutover])
+                        self._cutovers[table] = cutover
+                        logger.info(f"Started monthly partitions for {table}")
+                self._partitions = partitions
+            return self._partitions
+
+    def _partition(self, table: str, period: str) -> str:
+        """Worksheet holding one month of a table, created and catalogued on first use"""
+        partitions = self._catalog()[table]
+        name = partitions.get(period)
+        if name:
+            return name
+        with self._catalog_lock:
+            name = partitions.get(period)
+            if name is None:
+                name = f"{table}_{period}"
+                self._get_or_create_sheet(name, self._get_headers(table))
+                self._get_worksheet(CATALOG_SHEET).append_row([table, name, period, datetime.now().isoformat()])
+                self._partition_tables[name] = table
+                partitions[period] = name
+                logger.info(f"Created partition {name}")
+        return name
+
+    def _physical_sheets(self, sheet_name: str, since: Optional[str] = None) -> List[str]:
+        """Worksheets holding a table's rows, newest first, skipping partitions that end before since"""
+        if sheet_name not in self.partitioned:
+            return [sheet_name]
+        partitions = self._catalog()[sheet_name]
+        since_period = self._period(since) if since else ''
+        names = [partitions[period] for period in sorted(list(partitions), reverse=True) if period >= since_period]
+        if not since or since < self._cutovers[sheet_name]:
+            names.append(sheet_name)
+        return names
+
+    @staticmethod
+    def _since_filter(sheet_name: str, records: List[Dict[str, Any]], since: Optional[str]) -> List[Dict[str, Any]]:
+        """Keep records of a time-stamped table at or after since"""
+        time_column = TIME_COLUMNS.get(sheet_name)
+        if not since or not time_column:
+            return records
+        return [record for record in records if str(record.get(time_column, '')) >= since]
+
+    def refresh(self, sheet_name: Optional[str] = None) -> List[str]:
+        """Drop cached data (one table or all) and reload it from Google Sheets"""
+        with self._lock:
+            cached = list(self._cache.keys())
+            self._cache_stats['refreshes'] += 1
+        names = self._physical_sheets(sheet_name) if sheet_name else cached
+        for name in names:
+            self._invalidate(name)
+            self._load_records(name)
+        logger.info(f"Refreshed table cache for: {', '.join(names) or 'nothing cached'}")
+        return names
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size of the table cache"""
+        with self._lock:
+            lookups = self._cache_stats['hits'] + self._cache_stats['misses']
+            return {
+                'backend': self.name,
+                **self._cache_stats,
+                'hit_rate': round(self._cache_stats['hits'] / lookups, 3) if lookups else 0.0,
+                'ttl_seconds': settings.SHEETS_CACHE_TTL_SECONDS,
+                'max_rows': settings.SHEETS_CACHE_MAX_ROWS,
+                'cached_rows': sum(len(entry['records']) for entry in self._cache.values()),
+                'sheets': {name: len(entry['records']) for name, entry in self._cache.items()},
+                'tombstones': {name: count for name, count in self._tombstones.items() if count},
+                'partitions': {table: sorted(periods) for table, periods in (self._partitions or {}).items()},
+            }
+
+    def _start_flusher(self):
+        """Start the background thread that flushes queued rows"""
+        self._flush_thread = threading.Thread(
+            target=self._flush_loop, name="sheets-write-behind", daemon=True
+        )
+        self._flush_thread.start()
+        logger.info(
+            f"Write-behind enabled (max_rows={settings.SHEETS_FLUSH_MAX_ROWS}, "
+            f"interval={settings.SHEETS_FLUSH_INTERVAL_SECONDS}s)"
+        )
+
+    def _flush_loop(self):
+        """Flush queued rows whenever the size threshold trips or the interval elapses"""
+        while not self._stop_event.is_set():
+            self._flush_event.wait(timeout=settings.SHEETS_FLUSH_INTERVAL_SECONDS)
+            self._flush_event.clear()
+            self.flush()
+
+    def flush(self) -> bool:
+        """Append all queued rows, one append_rows call per sheet"""
+        with self._flush_lock:
+            with self._lock:
+                batches = {name: rows for name, rows in self._pending.items() if rows}
+                self._pending = {}
+                self._inflight = batches
+
+            success = True
+            for sheet_name, rows in batches.items():
+                try:
+                    self._get_worksheet(sheet_name).append_rows(rows)
+                    logger.debug(f"Flushed {len(rows)} rows into {sheet_name}")
+                except Exception as e:
+                    success = False
+                    logger.error(f"Failed to flush {len(rows)} rows into {sheet_name}: {str(e)}")
+                    # Put the batch back in front of anything queued meanwhile
+                    with self._lock:
+                        self._pending[sheet_name] = rows + self._pending.get(sheet_name, [])
+
+            with self._lock:
+                self._inflight = {}
+                for sheet_name in batches:
+                    # Loads that overlapped this flush must not be cached
+                    self._cache_versions[sheet_name] = self._cache_versions.get(sheet_name, 0) + 1
+                    self._flush_counts[sheet_name] = self._flush_counts.get(sheet_name, 0) + 1
+            return success
+
+    def _start_compactor(self):
+        """Start the background thread that compacts tombstoned rows"""
+        self._compact_thread = threading.Thread(
+            target=self._compact_loop, name="sheets-compactor", daemon=True
+        )
+        self._compact_thread.start()
+
+    def _compact_loop(self):
+        """Compact sheets with tombstones once no local write has happened for a while"""
+        while not self._stop_event.wait(timeout=settings.SHEETS_COMPACTION_INTERVAL_SECONDS):
+            with self._lock:
+                dirty = any(self._tombstones.values())
+                quiet_for = time.monotonic() - self._last_write
+            if dirty and quiet_for >= settings.SHEETS_COMPACTION_QUIET_SECONDS:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Background compaction failed: {str(e)}")
+
+    def _is_tombstone(self, record: Dict[str, Any]) -> bool:
+        """Whether a cached record has been deleted"""
+        if 'status' in record:
+            return record['status'] == 'deleted'
+        return bool(record) and str(next(iter(record.values()))) == TOMBSTONE
+
+    def compact(self, sheet_name: Optional[str] = None) -> Dict[str, int]:
+        """
+        Rewrite sheets without their tombstoned rows in one bulk update per sheet.
+        Row numbers change, so the cache for each compacted sheet is dropped.
+        Returns rows removed per sheet.
+        """
+        with self._lock:
+            dirty = [name for name, count in self._tombstones.items() if count]
+        names = self._physical_sheets(sheet_name) if sheet_name else dirty
+        # Land queued appends first so they are compacted with everything else
+        self.flush()
+
+        removed = {}
+        # No row-targeted write, append or read may run while rows move
+        with self._layout_lock.exclusive(), self._flush_lock, self._lock:
+            for name in names:
+                worksheet = self._get_worksheet(name)
+                values = worksheet.get_all_values()
+                if not values:
+                    continue
+                header, rows = values[0], values[1:]
+                status_idx = header.index('status') if 'status' in header else None
+                live = [
+                    row for row in rows
+                    if any(row)
+                    and row[0] != TOMBSTONE
+                    and (status_idx is None or row[status_idx] != 'deleted')
+                ]
+                dropped = len(rows) - len(live)
+                if dropped:
+                    # Overwrite in place and blank out the now-unused tail rows
+                    width = len(header)
+                    blank = [''] * width
+                    worksheet.update([header] + live + [blank] * dropped, range_name='A1')
+                self._tombstones[name] = 0
+                self._invalidate(name)
+                removed[name] = dropped
+                logger.info(f"Compacted {name}: removed {dropped} tombstoned rows")
+        return removed
+
+    def close(self):
+        """Stop background threads and flush whatever is still queued"""
+        self._stop_event.set()
+        self._flush_event.set()
+        for thread in (self._flush_thread, self._compact_thread):
+            if thread is not None:
+                thread.join(timeout=10)
+        self._flush_thread = None
+        self._compact_thread = None
+        self.flush()
+
     def initialize_schema(self):
         """Initialize all sheets with proper schema"""
         logger.info("Initializing database schema...")
         
-        # Agents Sheet
-        self._get_or_create_sheet('Agents', [
-            'agent_id', 'name', 'persona', 'system_instructions', 
-            'tools', 'escalation_threshold', 'created_at', 'updated_at', 'status'
-        ])
-        
-        # Conversations Sheet
-        self._get_or_create_sheet('Conversations', [
-            'conversation_id', 'agent_id', 'user_id', 'started_at', 
-            'ended_at', 'status', 'total_messages'
-        ])
-        
-        # Messages Sheet
-        self._get_or_create_sheet('Messages', [
-            'message_id', 'conversation_id', 'agent_id', 'role', 
-            'content', 'intent', 'confidence_score', 'timestamp', 'escalated'
-        ])
-        
-        # Escalations Sheet
-        self._get_or_create_sheet('Escalations', [
-            'escalation_id', 'conversation_id', 'message_id', 'agent_id',
-            'query', 'reason', 'status', 'created_at', 'resolved_at', 
-            'resolved_by', 'resolution_notes'
-        ])
-        
-        # Metrics Sheet
-        self._get_or_create_sheet('Metrics', [
-            'date', 'agent_id', 'total_queries', 'resolved_queries',
-            'escalated_queries', 'resolution_rate', 'avg_confidence'
-        ])
+        for sheet_name, headers in SCHEMA.items():
+            self._get_or_create_sheet(sheet_name, headers)
+        if self.partitioned:
+            self._catalog()
         
         logger.info("Database schema initialized successfully")
 
     def insert_row(self, sheet_name: str, data: Dict[str, Any]) -> bool:
         """Insert a row into a sheet"""
+        return self.insert_rows(sheet_name, [data])
+
+    def insert_rows(self, sheet_name: str, rows_data: List[Dict[str, Any]]) -> bool:
+        """Insert several rows into a sheet with a single append (one per month for partitioned tables)"""
         try:
-            worksheet = self.sheets.get(sheet_name) or self.spreadsheet.worksheet(sheet_name)
-            headers = worksheet.row_values(1)
-            
-            # Create row in the same order as headers
-            row = []
-            for header in headers:
-                value = data.get(header, '')
-                # Convert lists/dicts to JSON strings
-                if isinstance(value, (list, dict)):
-                    value = json.dumps(value)
-                row.append(str(value))
-            
-            worksheet.append_row(row)
-            logger.debug(f"Inserted row into {sheet_name}")
+            if not rows_data:
+                return True
+            self._last_write = time.monotonic()
+            if sheet_name not in self.partitioned:
+                self._append_rows(sheet_name, rows_data)
+                return True
+
+            time_column = TIME_COLUMNS[sheet_name]
+            by_period: Dict[str, List[Dict[str, Any]]] = {}
+            for data in rows_data:
+                by_period.setdefault(self._period(data.get(time_column)), []).append(data)
+            for period, period_rows in by_period.items():
+                self._append_rows(self._partition(sheet_name, period), period_rows)
             return True
         except Exception as e:
-            logger.error(f"Failed to insert row into {sheet_name}: {str(e)}")
+            logger.error(f"Failed to insert rows into {sheet_name}: {str(e)}")
             return False
 
-    def get_all_rows(self, sheet_name: str) -> List[Dict[str, Any]]:
-        """Get all rows from a sheet as list of dicts"""
+    def _append_rows(self, sheet_name: str, rows_data: List[Dict[str, Any]]):
+        """Append rows to one worksheet, or queue them when write-behind is on"""
+        headers = self._get_headers(sheet_name)
+
+        # Create rows in the same order as headers
+        rows = [[self._serialize(data.get(header, '')) for header in headers] for data in rows_data]
+
+        if self.write_behind:
+            with self._lock:
+                # Flushes append in queue order, so the cache is patched in that same order
+                self._pending.setdefault(sheet_name, []).extend(rows)
+                queued = sum(len(pending) for pending in self._pending.values())
+                for row in rows:
+                    self._patch_cache(sheet_name, record=self._to_record(headers, row))
+            if queued >= settings.SHEETS_FLUSH_MAX_ROWS:
+                self._flush_event.set()
+            logger.debug(f"Queued {len(rows)} rows for {sheet_name}")
+            return
+
+        with self._lock:
+            append_lock = self._append_locks.setdefault(sheet_name, threading.Lock())
+        # Concurrent appends would land in one order and patch the cache in another
+        with self._layout_lock.shared(), append_lock:
+            try:
+                self._get_worksheet(sheet_name).append_rows(rows)
+            except Exception:
+                # The rows may have landed anyway, which would shift every later position
+                self._invalidate(sheet_name)
+                raise
+            for row in rows:
+                self._patch_cache(sheet_name, record=self._to_record(headers, row))
+        logger.debug(f"Inserted {len(rows)} rows into {sheet_name}")
+
+    def get_all_rows(self, sheet_name: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all rows from a sheet as list of dicts, reading only the partitions that can match since"""
         try:
-            worksheet = self.sheets.get(sheet_name) or self.spreadsheet.worksheet(sheet_name)
-            records = worksheet.get_all_records()
+            # Hand out copies so callers can't modify the cached records
+            records = [
+                dict(record)
+                for name in reversed(self._physical_sheets(sheet_name, since))
+                for record in self._load_records(name)
+                if not self._is_tombstone(record)
+            ]
+            records = self._since_filter(sheet_name, records, since)
             logger.debug(f"Retrieved {len(records)} rows from {sheet_name}")
             return records
         except Exception as e:
             logger.error(f"Failed to get rows from {sheet_name}: {str(e)}")
             return []
 
+    def get_columns(self, columns_by_sheet: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Read only the given columns of several tables with a single values_batch_get.
+        Worksheets already in the table cache are projected from it without a request.
+        """
+        try:
+            parts: Dict[str, List[List[Dict[str, Any]]]] = {}
+            fetches = []
+            ranges = []
+            for sheet_name, columns in columns_by_sheet.items():
+                parts[sheet_name] = []
+                for name in reversed(self._physical_sheets(sheet_name)):
+                    records = self._cached_records(name)
+                    if records is None:
+                        records = []
+                        runs = self._column_runs(name, columns)
+                        fetches.append((name, runs, records))
+                        ranges.extend(
+                            f"'{name}'!{rowcol_to_a1(2, run[0] + 1)}:{rowcol_to_a1(1, run[-1] + 1)[:-1]}"
+                            for run in runs
+                        )
+                    parts[sheet_name].append(records)
+
+            if ranges:
+                value_ranges = iter(self.spreadsheet.values_batch_get(ranges).get('valueRanges', []))
+                for name, runs, records in fetches:
+                    records.extend(self._assemble_records(name, runs, [next(value_ranges).get('values', []) for _ in runs]))
+                logger.debug(f"Read {len(ranges)} column ranges from {len(fetches)} sheets in one request")
+
+            return {
+                sheet_name: [
+                    {column: record.get(column, '') for column in columns}
+                    for records in parts[sheet_name]
+                    for record in records
+                    if not self._is_tombstone(record)
+                ]
+                for sheet_name, columns in columns_by_sheet.items()
+            }
+        except Exception as e:
+            logger.error(f"Failed to get columns from {', '.join(columns_by_sheet)}: {str(e)}")
+            return {sheet_name: [] for sheet_name in columns_by_sheet}
+
+    def _column_runs(self, sheet_name: str, columns: List[str]) -> List[List[int]]:
+        """Contiguous runs of column positions to fetch; always includes the key and status columns tombstones live in"""
+        headers = self._get_headers(sheet_name)
+        wanted = set(columns) | {headers[0], 'status'}
+        runs: List[List[int]] = []
+        for col_idx, header in enumerate(headers):
+            if header not in wanted:
+                continue
+            if runs and col_idx == runs[-1][-1] + 1:
+                runs[-1].append(col_idx)
+            else:
+                runs.append([col_idx])
+        return runs
+
+    def _assemble_records(self, sheet_name: str, runs: List[List[int]], values: List[List[List[str]]]) -> List[Dict[str, Any]]:
+        """Stitch per-range values back into partial records, plus any rows still queued for a flush"""
+        headers = self._get_headers(sheet_name)
+        columns = [headers[col_idx] for run in runs for col_idx in run]
+        records = []
+        for row_idx in range(max((len(run_values) for run_values in values), default=0)):
+            cells = []
+            for run, run_values in zip(runs, values):
+                row = run_values[row_idx] if row_idx < len(run_values) else []
+                cells.extend(row[pos] if pos < len(row) else '' for pos in range(len(run)))
+            if any(cells):
+                records.append(dict(zip(columns, numericise_all(cells))))
+
+        with self._lock:
+            queued = self._queued_rows(sheet_name)
+        if queued:
+            seen = {str(record.get(headers[0])) for record in records}
+            records.extend(self._to_record(headers, row) for row in queued if row[0] not in seen)
+        return records
+
     def find_row(self, sheet_name: str, key: str, value: Any) -> Optional[Dict[str, Any]]:
         """Find a row by key-value pair"""
         try:
-            records = self.get_all_rows(sheet_name)
-            for record in records:
-                if str(record.get(key)) == str(value):
-                    return record
+            # Newest partition first: recent rows are the ones usually looked up
+            for name in self._physical_sheets(sheet_name):
+                matches = self._find_records(name, key, value)
+                if matches:
+                    return dict(matches[0][1])
             return None
         except Exception as e:
             logger.error(f"Failed to find row in {sheet_name}: {str(e)}")
             return None
 
-    def update_row(self, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> bool:
-        """Update a row by finding it with key-value pair"""
+    def find_rows(self, sheet_name: str, key: str, value: Any, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find every row matching a key-value pair (e.g. all messages of a conversation)"""
         try:
-            worksheet = self.sheets.get(sheet_name) or self.spreadsheet.worksheet(sheet_name)
-            headers = worksheet.row_values(1)
-            all_values = worksheet.get_all_values()
-            
-            # Find the key column index
-            key_col_idx = headers.index(key)
-            
-            # Find the row
-            for row_idx, row in enumerate(all_values[1:], start=2):  # Skip header
+            records = [
+                dict(record)
+                for name in reversed(self._physical_sheets(sheet_name, since))
+                for _, record in self._find_records(name, key, value)
+            ]
+            return self._since_filter(sheet_name, records, since)
+        except Exception as e:
+            logger.error(f"Failed to find rows in {sheet_name}: {str(e)}")
+            return []
+
+    def _update_queued_row(self, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> Optional[bool]:
+        """
+        Apply updates to a row that has not been flushed yet.
+        Returns True if a pending row was patched, False if the row is mid-flush,
+        and None if the row is not queued at all.
+        """
+        headers = self._get_headers(sheet_name)
+        if key not in headers:
+            return None
+        key_col_idx = headers.index(key)
+
+        with self._lock:
+            for row in self._pending.get(sheet_name, []):
                 if row[key_col_idx] == str(value):
-                    # Update the row
                     for update_key, update_value in updates.items():
                         if update_key in headers:
-                            col_idx = headers.index(update_key) + 1  # 1-indexed
-                            if isinstance(update_value, (list, dict)):
-                                update_value = json.dumps(update_value)
-                            worksheet.update_cell(row_idx, col_idx, str(update_value))
-                    logger.debug(f"Updated row in {sheet_name}")
+                            row[headers.index(update_key)] = self._serialize(update_value)
                     return True
-            
-            logger.warning(f"Row not found in {sheet_name} with {key}={value}")
+            for row in self._inflight.get(sheet_name, []):
+                if row[key_col_idx] == str(value):
+                    return False
+        return None
+
+    @staticmethod
+    def _cell_ranges(headers: List[str], row_idx: int, updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """batch_update ranges covering only the changed cells of one row, merged into contiguous runs"""
+        cells = sorted(
+            (headers.index(update_key) + 1, GoogleSheetsDB._serialize(update_value))
+            for update_key, update_value in updates.items()
+            if update_key in headers
+        )
+        ranges = []
+        run: List[Tuple[int, str]] = []
+        for col_idx, cell_value in cells:
+            if run and col_idx != run[-1][0] + 1:
+                ranges.append(run)
+                run = []
+            run.append((col_idx, cell_value))
+        if run:
+            ranges.append(run)
+        return [
+            {
+                'range': f"{rowcol_to_a1(row_idx, run[0][0])}:{rowcol_to_a1(row_idx, run[-1][0])}",
+                'values': [[cell_value for _, cell_value in run]],
+            }
+            for run in ranges
+        ]
+
+    def update_row(self, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> bool:
+        """Update a row by finding it with key-value pair"""
+        try:
+            return self.update_rows(sheet_name, key, {value: updates}) == 1
+        except Exception:
             return False
+
+    def update_rows(self, sheet_name: str, key: str, updates_by_value: Dict[Any, Dict[str, Any]]) -> int:
+        """
+        Update many rows (key value -> updates) with a single batch_update per worksheet.
+        Returns rows updated; raises if the sheet can't be read or written.
+        """
+        try:
+            self._last_write = time.monotonic()
+            remaining = dict(updates_by_value)
+            for name in self._physical_sheets(sheet_name):
+                if not remaining:
+                    break
+                for value in self._update_sheet_rows(name, key, remaining):
+                    del remaining[value]
+            for value in remaining:
+                logger.warning(f"Row not found in {sheet_name} with {key}={value}")
+            return len(updates_by_value) - len(remaining)
         except Exception as e:
-            logger.error(f"Failed to update row in {sheet_name}: {str(e)}")
-            return False
+            logger.error(f"Failed to update rows in {sheet_name}: {str(e)}")
+            raise
+
+    def _update_sheet_rows(self, sheet_name: str, key: str, updates_by_value: Dict[Any, Dict[str, Any]]) -> List[Any]:
+        """Update the rows of one worksheet that match; returns the key values found"""
+        found = []
+        remaining = dict(updates_by_value)
+        if self.write_behind:
+            mid_flush = False
+            for value, updates in updates_by_value.items():
+                queued = self._update_queued_row(sheet_name, key, value, updates)
+                if queued:
+                    self._patch_cache(sheet_name, key, value, updates=updates)
+                    del remaining[value]
+                    found.append(value)
+                elif queued is False:
+                    mid_flush = True
+            if mid_flush:
+                # Some rows are being appended right now; wait for them to land. A failed flush
+                # puts its rows back in the queue, so those are patched there, never by position.
+                with self._flush_lock:
+                    for value, updates in list(remaining.items()):
+                        if self._update_queued_row(sheet_name, key, value, updates):
+                            self._patch_cache(sheet_name, key, value, updates=updates)
+                            del remaining[value]
+                            found.append(value)
+            if found:
+                logger.debug(f"Updated {len(found)} queued rows in {sheet_name}")
+
+        headers = self._get_headers(sheet_name)
+        with self._layout_lock.shared():
+            data = []
+            located = []
+            for value, updates in remaining.items():
+                matches = self._find_records(sheet_name, key, value)
+                if not matches:
+                    continue
+                data.extend(self._cell_ranges(headers, matches[0][0] + 2, updates))  # Skip header, 1-indexed
+                located.append(value)
+
+            if data:
+                self._get_worksheet(sheet_name).batch_update(data)
+            for value in located:
+                self._patch_cache(sheet_name, key, value, updates=remaining[value])
+        if located:
+            logger.debug(f"Updated {len(located)} rows in {sheet_name} with {len(data)} ranges")
+        return found + located
 
     def delete_row(self, sheet_name: str, key: str, value: Any) -> bool:
-        """Delete a row by key-value pair"""
+        """
+        Delete a row by key-value pair.
+        Rows already in the sheet are tombstoned (status='deleted', or a marker in the
+        first column for sheets without status) so row numbers stay valid until compaction.
+        """
         try:
-            worksheet = self.sheets.get(sheet_name) or self.spreadsheet.worksheet(sheet_name)
-            headers = worksheet.row_values(1)
-            all_values = worksheet.get_all_values()
-            
-            key_col_idx = headers.index(key)
-            
-            for row_idx, row in enumerate(all_values[1:], start=2):
-                if row[key_col_idx] == str(value):
-                    worksheet.delete_rows(row_idx)
-                    logger.debug(f"Deleted row from {sheet_name}")
-                    return True
-            
-            return False
+            self._last_write = time.monotonic()
+            return any(self._delete_sheet_row(name, key, value) for name in self._physical_sheets(sheet_name))
         except Exception as e:
             logger.error(f"Failed to delete row from {sheet_name}: {str(e)}")
-            return False
+            raise
+
+    def _drop_queued_row(self, sheet_name: str, key_col_idx: int, key: str, value: Any) -> bool:
+        """Remove a row that has not been flushed yet; False if it is not queued"""
+        with self._lock:
+            pending = self._pending.get(sheet_name, [])
+            for row in pending:
+                if row[key_col_idx] == str(value):
+                    pending.remove(row)
+                    self._patch_cache(sheet_name, key, value, delete=True)
+                    logger.debug(f"Dropped queued row from {sheet_name}")
+                    return True
+        return False
+
+    def _delete_sheet_row(self, sheet_name: str, key: str, value: Any) -> bool:
+        """Delete the first matching row of one worksheet; False if it has none"""
+        if self.write_behind:
+            headers = self._get_headers(sheet_name)
+            key_col_idx = headers.index(key)
+            if self._drop_queued_row(sheet_name, key_col_idx, key, value):
+                return True
+            # Make sure a row that is mid-flush has landed before we look for it; check the queue
+            # again then, since a failed flush puts its rows back there
+            with self._flush_lock:
+                if self._drop_queued_row(sheet_name, key_col_idx, key, value):
+                    return True
+
+        headers = self._get_headers(sheet_name)
+        tombstone = {'status': 'deleted'} if 'status' in headers else {headers[0]: TOMBSTONE}
+        with self._layout_lock.shared():
+            matches = self._find_records(sheet_name, key, value)
+            if not matches:
+                return False
 
-# Singleton instance
-sheets_db = GoogleSheetsDB()
+            row_idx = matches[0][0] + 2
+            self._get_worksheet(sheet_name).batch_update(self._cell_ranges(headers, row_idx, tombstone))
+            self._patch_cache(sheet_name, key, value, updates=tombstone)
+        with self._lock:
+            self._tombstones[sheet_name] = self._tombstones.get(sheet_name, 0) + 1
+        logger.debug(f"Tombstoned row {row_idx} in {sheet_name}")
+        return True
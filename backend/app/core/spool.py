@@ -0,0 +1,267 @@
+from app.core.config import settings
+from app.core.storage import db
+from app.core.storage_backend import StorageBackend, PRIMARY_KEYS
+from collections import deque
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class WriteAheadSpool:
+    """
+    Append-only local log of storage mutations.
+
+    Callers append a batch of mutations and return as soon as it is fsynced; concurrent
+    appenders share one fsync (group commit). A background replayer applies fsynced entries
+    to the backend in seq order and in batches, flushes the backend, then advances a checkpoint.
+    On startup every entry after the checkpoint is replayed again, skipping inserts whose
+    primary key (message_id, escalation_id, ...) is already stored.
+
+    Entry shapes:
+        {'op': 'insert', 'sheet': ..., 'data': {...}}
+        {'op': 'update', 'sheet': ..., 'key': ..., 'value': ..., 'updates': {...}}
+        {'op': 'delete', 'sheet': ..., 'key': ..., 'value': ...}
+    """
+    def __init__(self, backend: StorageBackend, path: str):
+        self.backend = backend
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.dead_letter_path = f"{path}.dead"
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._applied = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+        self._queue: deque = deque()
+        self._seq = 0
+        self._synced_seq = 0
+        self.applied_seq = self._read_checkpoint()
+        self.dead_letters = 0
+        self._recover()
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._replay_loop, name="storage-wal-replayer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        logger.info(f"Write-ahead spool at {path} (checkpoint={self.applied_seq}, backlog={len(self._queue)})")
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, seq: int):
+        """Atomically replace the checkpoint file"""
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _recover(self):
+        """Queue every entry written after the last checkpoint and cut off a torn tail"""
+        self._seq = self.applied_seq
+        if not os.path.exists(self.path):
+            return
+        good_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write was never acknowledged
+                    logger.warning("Dropping unreadable tail of the spool")
+                    break
+                good_bytes += len(line)
+                self._seq = max(self._seq, entry['seq'])
+                if entry['seq'] > self.applied_seq:
+                    entry['recovered'] = True
+                    self._queue.append(entry)
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_bytes)
+        self._synced_seq = self._seq
+        if self._queue:
+            logger.info(f"Recovered {len(self._queue)} unapplied spool entries")
+            self._wake.set()
+
+    def append(self, entries: List[Dict[str, Any]]) -> int:
+        """Durably record mutations; returns the sequence number of the last one"""
+        with self._lock:
+            # Queued with their seqs, so the queue stays in log order; replay waits for the fsync
+            for entry in entries:
+                self._seq += 1
+                entry['seq'] = self._seq
+                self._file.write(json.dumps(entry, default=str) + '\n')
+            self._file.flush()
+            self._queue.extend(entries)
+            last_seq = self._seq
+        self._sync(last_seq)
+        self._wake.set()
+        return last_seq
+
+    def _sync(self, seq: int):
+        """fsync the log unless another appender's fsync already covered seq"""
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._lock:
+                target = self._seq
+            os.fsync(self._file.fileno())
+            self._synced_seq = target
+
+    def wait_applied(self, seq: int, timeout: float) -> bool:
+        """Block until the backend has everything up to seq"""
+        with self._applied:
+            return self._applied.wait_for(lambda: self.applied_seq >= seq, timeout=timeout)
+
+    def _replay_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=settings.STORAGE_WAL_REPLAY_INTERVAL_SECONDS)
+            self._wake.clear()
+            try:
+                while self.replay() and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                logger.error(f"Spool replay failed: {str(e)}")
+
+    def _already_stored(self, entry: Dict[str, Any]) -> bool:
+        """Idempotency check for inserts that may have been applied before a crash or retry"""
+        key = PRIMARY_KEYS.get(entry['sheet'])
+        value = entry['data'].get(key) if key else None
+        return bool(value) and self.backend.find_row(entry['sheet'], key, value) is not None
+
+    def _apply(self, batch: List[Dict[str, Any]]) -> int:
+        """Apply entries in order, grouping runs of inserts/updates; returns how many were applied"""
+        applied = 0
+        while applied < len(batch):
+            first = batch[applied]
+            run = [first]
+            for entry in batch[applied + 1:]:
+                same_run = (
+                    entry['op'] == first['op'] and entry['sheet'] == first['sheet']
+                    and first['op'] in ('insert', 'update') and entry.get('key') == first.get('key')
+                )
+                if not same_run:
+                    break
+                run.append(entry)
+
+            try:
+                if first['op'] == 'insert':
+                    rows = [entry['data'] for entry in run if not (entry.get('recovered') and self._already_stored(entry))]
+                    if rows and not self.backend.insert_rows(first['sheet'], rows):
+                        return applied
+                elif first['op'] == 'update':
+                    merged: Dict[Any, Dict[str, Any]] = {}
+                    for entry in run:
+                        merged.setdefault(entry['value'], {}).update(entry['updates'])
+                    # Storage errors raise and are retried; a missing row is not retryable, so only log it
+                    updated = self.backend.update_rows(first['sheet'], first['key'], merged)
+                    if updated < len(merged):
+                        logger.warning(f"Spool update matched {updated}/{len(merged)} rows in {first['sheet']}")
+                elif first['op'] == 'delete':
+                    if not self.backend.delete_row(first['sheet'], first['key'], first['value']):
+                        logger.warning(f"Spool delete found no row in {first['sheet']} with {first['key']}={first['value']}")
+                else:
+                    logger.error(f"Unknown spool op {first['op']}")
+            except Exception as e:
+                logger.error(f"Spool {first['op']} on {first['sheet']} failed: {str(e)}")
+                return applied
+            applied += len(run)
+        return applied
+
+    def replay(self) -> bool:
+        """Apply the next batch; returns True if there may be more to do right away"""
+        with self._replay_lock:
+            return self._replay()
+
+    def _replay(self) -> bool:
+        with self._lock:
+            batch = []
+            for entry in self._queue:
+                if len(batch) >= settings.STORAGE_WAL_BATCH_SIZE or entry['seq'] > self._synced_seq:
+                    break
+                batch.append(entry)
+        if not batch:
+            return False
+
+        applied = self._apply(batch)
+        if applied and not self.backend.flush():
+            # Rows may be sitting in the backend's own buffer; retry them with dedupe
+            for entry in batch:
+                entry['recovered'] = True
+            return False
+
+        if applied < len(batch):
+            failed = batch[applied]
+            failed['attempts'] = failed.get('attempts', 0) + 1
+            failed['recovered'] = True
+            if failed['attempts'] >= settings.STORAGE_WAL_MAX_ATTEMPTS:
+                logger.error(f"Moving spool entry {failed['seq']} to dead letters after {failed['attempts']} attempts")
+                with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(failed, default=str) + '\n')
+                self.dead_letters += 1
+                applied += 1
+
+        if applied:
+            self._advance(batch[applied - 1]['seq'], applied)
+        if applied < len(batch):
+            # Back off before retrying the failed entry
+            time.sleep(min(2 ** batch[applied].get('attempts', 0), 30))
+            return False
+        return True
+
+    def _advance(self, seq: int, count: int):
+        """Drop applied entries, persist the checkpoint and wake waiters"""
+        with self._lock:
+            for _ in range(count):
+                self._queue.popleft()
+            # Batches are taken from the head of the queue, so this only guards against reordering bugs
+            seq = max(seq, self.applied_seq)
+            self._write_checkpoint(seq)
+            if not self._queue and self._seq == seq:
+                # Everything is applied; start a fresh log file
+                self._file.truncate(0)
+        with self._applied:
+            self.applied_seq = seq
+            self._applied.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': True,
+                'last_seq': self._seq,
+                'applied_seq': self.applied_seq,
+                'backlog': len(self._queue),
+                'dead_letters': self.dead_letters,
+            }
+
+    def close(self):
+        """Stop the replayer after one last attempt to drain the log"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        try:
+            while self.replay():
+                pass
+        except Exception as e:
+            logger.error(f"Final spool replay failed: {str(e)}")
+        self._file.close()
+
+# Singleton instance (None when the spool is disabled)
+spool: Optional[WriteAheadSpool] = (
+    WriteAheadSpool(db, settings.STORAGE_WAL_PATH) if settings.STORAGE_WAL_ENABLED else None
+)
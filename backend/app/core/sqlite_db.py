@@ -0,0 +1,262 @@
+from app.core.storage_backend import StorageBackend, SCHEMA, PRIMARY_KEYS, FOREIGN_KEYS, TIME_COLUMNS, numericise
+import json
+import logging
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Extra (non-key) columns that queries filter or sort on
+SECONDARY_INDEXES: Dict[str, List[str]] = {
+    'Messages': ['timestamp'],
+    'Conversations': ['started_at'],
+    'Escalations': ['conversation_id'],
+    'Metrics': ['date', 'agent_id'],
+}
+
+
+class SQLiteDB(StorageBackend):
+    """
+    Local SQLite engine behind the same row API as GoogleSheetsDB.
+    Each sheet is a table of TEXT columns; values are stored the way they would
+    be written to a cell and numericised on read, so callers see identical rows.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self.initialize_schema()
+        logger.info(f"SQLite storage ready at {path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside the writer"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _serialize(value: Any) -> str:
+        """Convert a value to the string stored in a cell"""
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value)
+        return str(value)
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {column: numericise(row[column]) for column in row.keys()}
+
+    @staticmethod
+    def _check_columns(sheet_name: str, *columns: str):
+        """Reject unknown tables/columns before they reach SQL"""
+        headers = SCHEMA.get(sheet_name)
+        if headers is None:
+            raise ValueError(f"Unknown table {sheet_name}")
+        for column in columns:
+            if column not in headers:
+                raise ValueError(f"Unknown column {column} in {sheet_name}")
+
+    @staticmethod
+    def _since_clause(sheet_name: str, since: Optional[str]) -> Tuple[str, List[str]]:
+        """Extra WHERE condition limiting a time-stamped table to rows at or after since"""
+        time_column = TIME_COLUMNS.get(sheet_name)
+        if not since or not time_column:
+            return '', []
+        return f' AND "{time_column}" >= ?', [since]
+
+    def initialize_schema(self):
+        """Create tables and indexes, adding any columns missing from older databases"""
+        conn = self._conn()
+        for sheet_name, headers in SCHEMA.items():
+            columns = ', '.join(f'"{header}" TEXT NOT NULL DEFAULT \'\'' for header in headers)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{sheet_name}" ({columns})')
+
+            existing = {row['name'] for row in conn.execute(f'PRAGMA table_info("{sheet_name}")')}
+            for header in headers:
+                if header not in existing:
+                    conn.execute(f'ALTER TABLE "{sheet_name}" ADD COLUMN "{header}" TEXT NOT NULL DEFAULT \'\'')
+                    logger.info(f"Added column {header} to {sheet_name}")
+
+            primary = PRIMARY_KEYS.get(sheet_name)
+            if primary:
+                conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{sheet_name}_{primary}" ON "{sheet_name}" ("{primary}")'
+                )
+            for column in FOREIGN_KEYS.get(sheet_name, []) + SECONDARY_INDEXES.get(sheet_name, []):
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "ix_{sheet_name}_{column}" ON "{sheet_name}" ("{column}")'
+                )
+        logger.info("SQLite schema initialized")
+
+    def insert_row(self, sheet_name: str, data: Dict[str, Any]) -> bool:
+        """Insert a row into a table"""
+        return self.insert_rows(sheet_name, [data])
+
+    def insert_rows(self, sheet_name: str, rows: List[Dict[str, Any]]) -> bool:
+        """Insert several rows in one transaction"""
+        try:
+            headers = SCHEMA[sheet_name]
+            placeholders = ', '.join('?' for _ in headers)
+            columns = ', '.join(f'"{header}"' for header in headers)
+            conn = self._conn()
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(
+                    f'INSERT INTO "{sheet_name}" ({columns}) VALUES ({placeholders})',
+                    [[self._serialize(data.get(header, '')) for header in headers] for data in rows],
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            logger.debug(f"Inserted {len(rows)} rows into {sheet_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to insert rows into {sheet_name}: {str(e)}")
+            return False
+
+    def import_rows(self, sheet_name: str, rows: List[Dict[str, Any]]) -> int:
+        """Replace the contents of a table with the given rows in one transaction (used by migrations)"""
+        headers = SCHEMA[sheet_name]
+        placeholders = ', '.join('?' for _ in headers)
+        columns = ', '.join(f'"{header}"' for header in headers)
+        conn = self._conn()
+        conn.execute('BEGIN')
+        try:
+            conn.execute(f'DELETE FROM "{sheet_name}"')
+            conn.executemany(
+                f'INSERT OR REPLACE INTO "{sheet_name}" ({columns}) VALUES ({placeholders})',
+                [[self._serialize(row.get(header, '')) for header in headers] for row in rows],
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def get_all_rows(self, sheet_name: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all rows from a table as list of dicts"""
+        try:
+            self._check_columns(sheet_name)
+            condition, params = self._since_clause(sheet_name, since)
+            cursor = self._conn().execute(
+                f'SELECT * FROM "{sheet_name}" WHERE 1 = 1{condition} ORDER BY rowid', params
+            )
+            records = [self._to_record(row) for row in cursor]
+            logger.debug(f"Retrieved {len(records)} rows from {sheet_name}")
+            return records
+        except Exception as e:
+            logger.error(f"Failed to get rows from {sheet_name}: {str(e)}")
+            return []
+
+    def get_columns(self, columns_by_sheet: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Read only the given columns of several tables"""
+        try:
+            result = {}
+            conn = self._conn()
+            for sheet_name, columns in columns_by_sheet.items():
+                self._check_columns(sheet_name, *columns)
+                selected = ', '.join(f'"{column}"' for column in columns)
+                cursor = conn.execute(f'SELECT {selected} FROM "{sheet_name}" ORDER BY rowid')
+                result[sheet_name] = [self._to_record(row) for row in cursor]
+            return result
+        except Exception as e:
+            logger.error(f"Failed to get columns from {', '.join(columns_by_sheet)}: {str(e)}")
+            return {sheet_name: [] for sheet_name in columns_by_sheet}
+
+    def find_row(self, sheet_name: str, key: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Find a row by key-value pair"""
+        try:
+            self._check_columns(sheet_name, key)
+            row = self._conn().execute(
+                f'SELECT * FROM "{sheet_name}" WHERE "{key}" = ? ORDER BY rowid LIMIT 1', (str(value),)
+            ).fetchone()
+            return self._to_record(row) if row else None
+        except Exception as e:
+            logger.error(f"Failed to find row in {sheet_name}: {str(e)}")
+            return None
+
+    def find_rows(self, sheet_name: str, key: str, value: Any, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find every row matching a key-value pair"""
+        try:
+            self._check_columns(sheet_name, key)
+            condition, params = self._since_clause(sheet_name, since)
+            cursor = self._conn().execute(
+                f'SELECT * FROM "{sheet_name}" WHERE "{key}" = ?{condition} ORDER BY rowid', [str(value)] + params
+            )
+            return [self._to_record(row) for row in cursor]
+        except Exception as e:
+            logger.error(f"Failed to find rows in {sheet_name}: {str(e)}")
+            return []
+
+    def _update(self, conn: sqlite3.Connection, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> bool:
+        """Run the UPDATE for one row; True if the row exists"""
+        columns = [column for column in updates if column in SCHEMA[sheet_name]]
+        if not columns:
+            return conn.execute(
+                f'SELECT 1 FROM "{sheet_name}" WHERE "{key}" = ? LIMIT 1', (str(value),)
+            ).fetchone() is not None
+        assignments = ', '.join(f'"{column}" = ?' for column in columns)
+        cursor = conn.execute(
+            f'UPDATE "{sheet_name}" SET {assignments} WHERE rowid = '
+            f'(SELECT rowid FROM "{sheet_name}" WHERE "{key}" = ? ORDER BY rowid LIMIT 1)',
+            [self._serialize(updates[column]) for column in columns] + [str(value)],
+        )
+        return cursor.rowcount > 0
+
+    def update_row(self, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> bool:
+        """Update a row by finding it with key-value pair"""
+        try:
+            self._check_columns(sheet_name, key)
+            if not self._update(self._conn(), sheet_name, key, value, updates):
+                logger.warning(f"Row not found in {sheet_name} with {key}={value}")
+                return False
+            logger.debug(f"Updated row in {sheet_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update row in {sheet_name}: {str(e)}")
+            return False
+
+    def update_rows(self, sheet_name: str, key: str, updates_by_value: Dict[Any, Dict[str, Any]]) -> int:
+        """Update many rows in one transaction; returns rows updated, raises on database errors"""
+        try:
+            self._check_columns(sheet_name, key)
+            conn = self._conn()
+            conn.execute('BEGIN')
+            try:
+                updated = sum(
+                    1 for value, updates in updates_by_value.items()
+                    if self._update(conn, sheet_name, key, value, updates)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            logger.debug(f"Updated {updated} rows in {sheet_name}")
+            return updated
+        except Exception as e:
+            logger.error(f"Failed to update rows in {sheet_name}: {str(e)}")
+            raise
+
+    def delete_row(self, sheet_name: str, key: str, value: Any) -> bool:
+        """Delete a row by key-value pair; False if there is none, raises on database errors"""
+        try:
+            self._check_columns(sheet_name, key)
+            cursor = self._conn().execute(
+                f'DELETE FROM "{sheet_name}" WHERE rowid = '
+                f'(SELECT rowid FROM "{sheet_name}" WHERE "{key}" = ? ORDER BY rowid LIMIT 1)',
+                (str(value),),
+            )
+            if cursor.rowcount == 0:
+                return False
+            logger.debug(f"Deleted row from {sheet_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete row from {sheet_name}: {str(e)}")
+            raise
@@ -0,0 +1,19 @@
+from app.core.config import settings
+from app.core.storage_backend import StorageBackend
+import logging
+
+logger = logging.getLogger(__name__)
+
+def get_storage() -> StorageBackend:
+    """Build the storage backend selected by settings.STORAGE_BACKEND"""
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == 'sqlite':
+        from app.core.sqlite_db import SQLiteDB
+        return SQLiteDB(settings.SQLITE_DB_PATH)
+    if backend != 'sheets':
+        logger.warning(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}', using Google Sheets")
+    from app.core.sheets_db import GoogleSheetsDB
+    return GoogleSheetsDB()
+
+# Singleton instance
+db = get_storage()
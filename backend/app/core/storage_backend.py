@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+# Table (sheet) name -> column headers, in storage order
+SCHEMA: Dict[str, List[str]] = {
+    'Agents': [
+        'agent_id', 'name', 'persona', 'system_instructions',
+        'tools', 'escalation_threshold', 'created_at', 'updated_at', 'status'
+    ],
+    'Conversations': [
+        'conversation_id', 'agent_id', 'user_id', 'started_at',
+        'ended_at', 'status', 'total_messages', 'summary', 'summary_until'
+    ],
+    'Messages': [
+        'message_id', 'conversation_id', 'agent_id', 'role',
+        'content', 'intent', 'confidence_score', 'timestamp', 'escalated', 'intent_source'
+    ],
+    'Escalations': [
+        'escalation_id', 'conversation_id', 'message_id', 'agent_id',
+        'query', 'reason', 'status', 'created_at', 'resolved_at',
+        'resolved_by', 'resolution_notes'
+    ],
+    'Metrics': [
+        'date', 'agent_id', 'total_queries', 'resolved_queries',
+        'escalated_queries', 'resolution_rate', 'avg_confidence'
+    ],
+}
+
+# Key columns that backends index
+PRIMARY_KEYS: Dict[str, str] = {
+    'Agents': 'agent_id',
+    'Conversations': 'conversation_id',
+    'Messages': 'message_id',
+    'Escalations': 'escalation_id',
+}
+FOREIGN_KEYS: Dict[str, List[str]] = {
+    'Conversations': ['agent_id'],
+    'Messages': ['conversation_id'],
+}
+
+# Timestamp column of append-mostly tables; `since` filters and time partitions use it.
+# Values are ISO-8601 strings, so string comparison orders them chronologically.
+TIME_COLUMNS: Dict[str, str] = {
+    'Messages': 'timestamp',
+    'Escalations': 'created_at',
+}
+
+
+def numericise(value: Any) -> Any:
+    """Turn numeric strings into int/float, the way gspread's get_all_records does"""
+    if isinstance(value, str) and value and '_' not in value:
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    return value
+
+
+class StorageBackend(ABC):
+    """
+    Row-oriented storage used by the services.
+    Every table is addressed by its sheet name and rows are plain dicts keyed by column.
+    """
+    name = 'base'
+
+    @abstractmethod
+    def initialize_schema(self):
+        """Create all tables with the columns in SCHEMA"""
+
+    @abstractmethod
+    def insert_row(self, sheet_name: str, data: Dict[str, Any]) -> bool:
+        """Insert a row into a table"""
+
+    def insert_rows(self, sheet_name: str, rows: List[Dict[str, Any]]) -> bool:
+        """Insert several rows into a table; True only if all were written"""
+        return all([self.insert_row(sheet_name, data) for data in rows])
+
+    @abstractmethod
+    def get_all_rows(self, sheet_name: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all rows from a table as list of dicts, optionally only those at or after `since` (ISO timestamp)"""
+
+    def get_columns(self, columns_by_sheet: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Read only the given columns of several tables (sheet -> columns); returns sheet -> rows"""
+        return {
+            sheet_name: [{column: row.get(column, '') for column in columns} for row in self.get_all_rows(sheet_name)]
+            for sheet_name, columns in columns_by_sheet.items()
+        }
+
+    @abstractmethod
+    def find_row(self, sheet_name: str, key: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Find a row by key-value pair"""
+
+    @abstractmethod
+    def find_rows(self, sheet_name: str, key: str, value: Any, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find every row matching a key-value pair, optionally only those at or after `since`"""
+
+    @abstractmethod
+    def update_row(self, sheet_name: str, key: str, value: Any, updates: Dict[str, Any]) -> bool:
+        """Update a row by finding it with key-value pair"""
+
+    def update_rows(self, sheet_name: str, key: str, updates_by_value: Dict[Any, Dict[str, Any]]) -> int:
+        """
+        Update many rows (key value -> updates); returns how many were found and updated.
+        Storage errors are raised, so callers can tell a failed write from a missing row.
+        """
+        return sum(
+            1 for value, updates in updates_by_value.items()
+            if self.update_row(sheet_name, key, value, updates)
+        )
+
+    @abstractmethod
+    def delete_row(self, sheet_name: str, key: str, value: Any) -> bool:
+        """Delete a row by key-value pair; False if there is none, raises on storage errors"""
+
+    def flush(self) -> bool:
+        """Push any buffered writes to the backing store"""
+        return True
+
+    def close(self):
+        """Flush and release resources at shutdown"""
+        self.flush()
+
+    def refresh(self, sheet_name: Optional[str] = None) -> List[str]:
+        """Drop cached data so the next read goes to the backing store"""
+        return []
+
+    def compact(self, sheet_name: Optional[str] = None) -> Dict[str, int]:
+        """Physically remove deleted rows, for backends that tombstone them"""
+        return {}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache counters, for backends that cache"""
+        return {'backend': self.name}
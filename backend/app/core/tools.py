@@ -0,0 +1,144 @@
+from app.core.config import settings
+from app.models.agent import Agent
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# A tool receives the agent and the user's query and returns the reply text
+ToolHandler = Callable[[Agent, str], Awaitable[str]]
+
+
+class ToolError(Exception):
+    """Raised when a tool times out or fails"""
+
+
+class Tool:
+    """One action an agent can be granted: trigger keywords, an async handler and its limits"""
+    def __init__(self, name: str, keywords: List[str], handler: ToolHandler,
+                 timeout: float, max_concurrency: int):
+        self.name = name
+        self.keywords = [k.lower() for k in keywords]
+        self.handler = handler
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Semaphore for the running event loop (test clients may start several loops)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(max(self.max_concurrency, 1))
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, agent: Agent, query: str) -> str:
+        """Run the handler within the tool's concurrency limit; waiting for a slot counts against the timeout"""
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with self._limit():
+                    return await self.handler(agent, query)
+        except asyncio.TimeoutError:
+            raise ToolError(f"Tool {self.name} timed out after {self.timeout}s")
+        except Exception as e:
+            raise ToolError(f"Tool {self.name} failed: {str(e)}") from e
+
+
+class ToolRegistry:
+    """
+    Tools available to agents, in priority order. All keywords are compiled into one regex, so a
+    query is matched against every tool in a single pass.
+    """
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._keyword_tools: Dict[str, List[str]] = {}
+
+    def register(self, name: str, keywords: List[str], timeout: Optional[float] = None,
+                 max_concurrency: Optional[int] = None) -> Callable[[ToolHandler], ToolHandler]:
+        """Decorator registering an async handler as a tool"""
+        def decorator(handler: ToolHandler) -> ToolHandler:
+            self._tools[name] = Tool(
+                name,
+                keywords,
+                handler,
+                settings.TOOL_TIMEOUT_SECONDS if timeout is None else timeout,
+                settings.TOOL_MAX_CONCURRENCY if max_concurrency is None else max_concurrency,
+            )
+            self._pattern = None
+            return handler
+        return decorator
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def _compile(self) -> re.Pattern:
+        keywords = sorted({k for tool in self._tools.values() for k in tool.keywords}, key=len, reverse=True)
+        # The longest keyword at a position stands for every keyword that is a prefix of it
+        self._keyword_tools = {
+            keyword: [tool.name for tool in self._tools.values()
+                      if any(keyword.startswith(k) for k in tool.keywords)]
+            for keyword in keywords
+        }
+        # Zero-width lookahead so matches may overlap; longest alternative first
+        self._pattern = re.compile('(?=(' + '|'.join(map(re.escape, keywords)) + '))') if keywords else re.compile('(?!)')
+        return self._pattern
+
+    def match(self, query: str) -> List[str]:
+        """Names of every tool with a keyword in the query, in registration order"""
+        pattern = self._pattern or self._compile()
+        matched = set()
+        for found in pattern.finditer(query.lower()):
+            matched.update(self._keyword_tools[found.group(1)])
+        return [name for name in self._tools if name in matched]
+
+# Singleton instance
+tool_registry = ToolRegistry()
+
+
+# Demo tools: canned replies until real order/refund integrations are wired in
+
+@tool_registry.register("check_order_status", ["check order", "order status", "where is my order", "track order"])
+async def check_order_status(agent: Agent, query: str) -> str:
+    return "I checked your order status. It is currently 'Shipped' (demo)."
+
+
+@tool_registry.register("initiate_refund", ["refund", "money back", "return"])
+async def initiate_refund(agent: Agent, query: str) -> str:
+    return "I initiated a refund for your order (demo)."
+
+
+@tool_registry.register("send_email", ["email", "send mail", "notify by email"])
+async def send_email(agent: Agent, query: str) -> str:
+    return "I sent an email notification with the latest update (demo)."
+
+
+@tool_registry.register("create_support_ticket", ["ticket", "support ticket", "escalate", "escalation"])
+async def create_support_ticket(agent: Agent, query: str) -> str:
+    return "I created a support ticket for escalation to a human (demo)."
+
+
+@tool_registry.register("apply_discount", ["discount", "promo", "coupon"])
+async def apply_discount(agent: Agent, query: str) -> str:
+    return "I applied the discount code to your account (demo)."
+
+
+@tool_registry.register("get_customer_profile", ["profile", "account info", "customer details"])
+async def get_customer_profile(agent: Agent, query: str) -> str:
+    return "I fetched your profile details (demo)."
+
+
+@tool_registry.register("update_order_address", ["change address", "update address", "delivery address"])
+async def update_order_address(agent: Agent, query: str) -> str:
+    return "I updated the delivery address on your order (demo)."
+
+
+@tool_registry.register("notify_vendor", ["vendor", "restaurant", "partner alert", "notify partner"])
+async def notify_vendor(agent: Agent, query: str) -> str:
+    return "I notified the vendor with your message (demo)."
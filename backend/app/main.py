@@ -1,6 +1,15 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import agents, chat, analytics, conversations
+from app.api.endpoints import agents, chat, analytics, conversations, storage
+from app.core.storage import db
+from app.core.async_storage import async_db
+from app.core.spool import spool
+from app.core.query_counters import query_counters
+from app.core.activity_feed import activity_feed
+from app.core.config import settings
+from app.services.metrics_rollup import metrics_rollup
+import asyncio
 import logging
 
 # Configure Logging
@@ -10,7 +19,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Customer Support Agentic App")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Analytics counters resume from their checkpoint; metric reads retry if this fails
+    try:
+        await async_db.run(query_counters.load)
+    except Exception as e:
+        logger.error(f"Error loading analytics counters: {str(e)}")
+    try:
+        await async_db.run(activity_feed.seed)
+    except Exception as e:
+        logger.error(f"Error seeding the activity feed: {str(e)}")
+    rollup_task = None
+    if settings.METRICS_ROLLUP_INTERVAL_SECONDS > 0:
+        rollup_task = asyncio.create_task(metrics_rollup.run_periodically())
+    yield
+    if rollup_task:
+        rollup_task.cancel()
+    # Push any write-behind rows to storage before the process exits
+    logger.info("Shutting down: flushing queued storage writes")
+    if spool:
+        spool.close()
+    query_counters.checkpoint()
+    async_db.shutdown()
+    db.close()
+
+app = FastAPI(title="Customer Support Agentic App", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -26,6 +60,7 @@ app.include_router(agents.router, prefix="/agents", tags=["agents"])
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 app.include_router(conversations.router, prefix="/conversations", tags=["conversations"])
+app.include_router(storage.router, prefix="/storage", tags=["storage"])
 
 @app.get("/")
 def read_root():
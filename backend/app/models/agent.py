@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, FrozenSet, List, Optional
 
 class AgentBase(BaseModel):
     name: str
@@ -14,6 +14,15 @@ class AgentCreate(AgentBase):
 
 class Agent(AgentBase):
     id: str
+    updated_at: Optional[str] = None
+    # Granted tools as a set, resolved once when the agent is loaded
+    _tool_set: FrozenSet[str] = PrivateAttr(default=frozenset())
+
+    def model_post_init(self, __context: Any):
+        self._tool_set = frozenset(self.tools)
+
+    def has_tool(self, name: str) -> bool:
+        return name in self._tool_set
 
     class Config:
         from_attributes = True
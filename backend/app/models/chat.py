@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class ChatRequest(BaseModel):
     agent_id: str  # Changed from int to str for UUID support
@@ -13,3 +13,6 @@ class ChatResponse(BaseModel):
     escalated: bool = False
     conversation_id: str  # Return the conversation ID
     tool_calls: Optional[Dict[str, Any]] = None
+
+class ResolveConversationsRequest(BaseModel):
+    conversation_ids: List[str]
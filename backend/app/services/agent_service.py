@@ -1,5 +1,7 @@
 from app.models.agent import Agent, AgentCreate
-from app.core.sheets_db import sheets_db
+from app.core.storage import db
+from app.core.answer_cache import answer_cache
+from app.core.activity_feed import activity_feed
 from typing import List, Optional
 import logging
 import uuid
@@ -9,7 +11,7 @@ logger = logging.getLogger(__name__)
 
 class AgentService:
     def __init__(self):
-        logger.info("AgentService initialized with Google Sheets storage")
+        logger.info(f"AgentService initialized with {db.name} storage")
 
     def create_agent(self, agent_in: AgentCreate) -> Agent:
         logger.info(f"Creating new agent: {agent_in.name}")
@@ -29,15 +31,16 @@ class AgentService:
             'status': 'active'
         }
         
-        sheets_db.insert_row('Agents', agent_data)
+        db.insert_row('Agents', agent_data)
         
-        agent = Agent(id=agent_id, **agent_in.model_dump())
+        agent = Agent(id=agent_id, updated_at=now, **agent_in.model_dump())
+        activity_feed.set_agent(agent_id, agent.name)
         logger.info(f"Agent created with ID: {agent_id}")
         return agent
 
     def get_agents(self) -> List[Agent]:
         logger.debug("Fetching all agents")
-        records = sheets_db.get_all_rows('Agents')
+        records = db.get_all_rows('Agents')
         
         agents = []
         for record in records:
@@ -57,7 +60,8 @@ class AgentService:
                     persona=record.get('persona'),
                     system_instructions=record.get('system_instructions'),
                     tools=tools,
-                    escalation_threshold=float(record.get('escalation_threshold', 0.5))
+                    escalation_threshold=float(record.get('escalation_threshold', 0.5)),
+                    updated_at=str(record.get('updated_at', ''))
                 )
                 agents.append(agent)
         
@@ -65,7 +69,7 @@ class AgentService:
 
     def get_agent(self, agent_id: str) -> Optional[Agent]:
         logger.debug(f"Fetching agent with ID: {agent_id}")
-        record = sheets_db.find_row('Agents', 'agent_id', agent_id)
+        record = db.find_row('Agents', 'agent_id', agent_id)
         
         if not record or record.get('status') != 'active':
             logger.warning(f"Agent ID {agent_id} not found")
@@ -86,7 +90,8 @@ class AgentService:
             persona=record.get('persona'),
             system_instructions=record.get('system_instructions'),
             tools=tools,
-            escalation_threshold=float(record.get('escalation_threshold', 0.5))
+            escalation_threshold=float(record.get('escalation_threshold', 0.5)),
+            updated_at=str(record.get('updated_at', ''))
         )
         return agent
 
@@ -102,11 +107,14 @@ class AgentService:
             'updated_at': datetime.now().isoformat()
         }
         
-        success = sheets_db.update_row('Agents', 'agent_id', agent_id, updates)
+        success = db.update_row('Agents', 'agent_id', agent_id, updates)
         
         if success:
+            # Cached answers are keyed by updated_at, so they already miss; free their memory too
+            answer_cache.invalidate_agent(agent_id)
             logger.info(f"Agent ID {agent_id} updated successfully")
-            return Agent(id=agent_id, **agent_in.model_dump())
+            activity_feed.set_agent(agent_id, agent_in.name)
+            return Agent(id=agent_id, updated_at=updates['updated_at'], **agent_in.model_dump())
         else:
             logger.warning(f"Agent ID {agent_id} not found for update")
             return None
@@ -114,8 +122,10 @@ class AgentService:
     def delete_agent(self, agent_id: str) -> bool:
         logger.info(f"Deleting agent ID: {agent_id}")
         try:
-            # Remove the row from Google Sheets
-            deleted = sheets_db.delete_row('Agents', 'agent_id', agent_id)
+            # Tombstones the row (status='deleted'); storage compacts it later
+            deleted = db.delete_row('Agents', 'agent_id', agent_id)
+            answer_cache.invalidate_agent(agent_id)
+            activity_feed.forget_agent(agent_id)
             if not deleted:
                 logger.warning(f"Agent ID {agent_id} not found for delete")
             return deleted
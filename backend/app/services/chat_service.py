@@ -1,8 +1,24 @@
 from app.models.chat import ChatRequest, ChatResponse
+from app.models.agent import Agent
 from app.services.agent_service import agent_service
-from app.core.llm import llm_service
-from app.core.sheets_db import sheets_db
+from app.core.llm import llm_service, FALLBACK_RESPONSES
+from app.core.answer_cache import answer_cache
+from app.core.intent_classifier import intent_classifier
+from app.core.history import plan_history
+from app.core.chat_sessions import ChatSession, chat_sessions
+from app.core.metrics import stage_metrics
+from app.core.query_counters import query_counters
+from app.core.activity_feed import activity_feed
+from app.core.tools import ToolError, tool_registry
+from app.core.storage import db
+from app.core.async_storage import async_db
+from app.core.config import settings
+from app.core.spool import spool
+from collections import OrderedDict
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import asyncio
 import logging
+import time
 from datetime import datetime
 import uuid
 
@@ -10,163 +26,217 @@ logger = logging.getLogger(__name__)
 
 class ChatService:
     def __init__(self):
-        logger.info("ChatService initialized with Google Sheets storage")
+        logger.info(f"ChatService initialized with {db.name} storage")
+        # Background shadow classifications and summary folds, kept referenced until they finish
+        self._background_tasks = set()
+        # Conversations whose summary is being extended right now
+        self._summarizing = set()
+        # conversation_id -> spool sequence of its latest write, for read-your-writes
+        self._conversation_seqs: "OrderedDict[str, int]" = OrderedDict()
 
-    def _get_or_create_conversation(self, agent_id: str, conversation_id: str = None) -> str:
-        """Get existing conversation or create a new one"""
+    async def _store(self, conversation_id: str, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Persist a batch of mutations: via the write-ahead spool when enabled, otherwise directly.
+        Returns False if a direct insert failed; spooled batches count as stored.
+        """
+        if spool:
+            seq = await async_db.run(spool.append, entries)
+            self._conversation_seqs[conversation_id] = seq
+            self._conversation_seqs.move_to_end(conversation_id)
+            while len(self._conversation_seqs) > 10000:
+                self._conversation_seqs.popitem(last=False)
+            return True
+
+        # Entries of one batch don't depend on each other, so issue them together:
+        # one insert_rows per sheet plus every update
+        inserts: Dict[str, List[Dict[str, Any]]] = {}
+        updates = []
+        for entry in entries:
+            if entry['op'] == 'insert':
+                inserts.setdefault(entry['sheet'], []).append(entry['data'])
+            elif entry['op'] == 'update':
+                updates.append(async_db.update_row(entry['sheet'], entry['key'], entry['value'], entry['updates']))
+        results = await asyncio.gather(
+            *(async_db.insert_rows(sheet_name, rows) for sheet_name, rows in inserts.items()), *updates
+        )
+        return all(results[:len(inserts)])
+
+    async def _await_conversation_writes(self, conversation_id: str):
+        """Wait (bounded) until spooled writes of this conversation have reached storage"""
+        seq = self._conversation_seqs.get(conversation_id)
+        if not spool or not seq:
+            return
+        deadline = time.monotonic() + settings.STORAGE_WAL_READ_WAIT_SECONDS
+        while spool.applied_seq < seq and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if spool.applied_seq < seq:
+            logger.warning(f"Reading conversation {conversation_id} before its spooled writes were applied")
+
+    async def _get_or_create_conversation(self, agent_id: str, conversation_id: str = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Get existing conversation or start a new one; returns (conversation row, created).
+        A new conversation is stored with the first turn's writes, not here.
+        """
         if conversation_id:
             # Verify conversation exists
-            existing = sheets_db.find_row('Conversations', 'conversation_id', conversation_id)
+            await self._await_conversation_writes(conversation_id)
+            existing = await async_db.find_row('Conversations', 'conversation_id', conversation_id)
             if existing:
                 logger.info(f"Using existing conversation: {conversation_id}")
-                return conversation_id
+                return existing, False
         
         # Create new conversation
         new_conversation_id = str(uuid.uuid4())
-        sheets_db.insert_row('Conversations', {
+        conversation = {
             'conversation_id': new_conversation_id,
             'agent_id': agent_id,
             'user_id': '',  # Could be added later
             'started_at': datetime.now().isoformat(),
             'ended_at': '',
             'status': 'active',
-            'total_messages': 0
-        })
-        logger.info(f"Created new conversation: {new_conversation_id}")
-        return new_conversation_id
-
-    def _get_conversation_history(self, conversation_id: str) -> list:
-        """Retrieve conversation history for context"""
-        all_messages = sheets_db.get_all_rows('Messages')
-        
-        # Filter messages for this conversation
-        conversation_messages = [
-            msg for msg in all_messages 
-            if msg.get('conversation_id') == conversation_id
-        ]
+            'total_messages': 0,
+            'summary': '',
+            'summary_until': ''
+        }
+        logger.info(f"Started new conversation: {new_conversation_id}")
+        return conversation, True
+
+    async def _get_conversation_history(self, conversation: Dict[str, Any]) -> list:
+        """Retrieve the messages not yet folded into the conversation summary, oldest first"""
+        since = str(conversation.get('summary_until') or conversation.get('started_at') or '')
+        conversation_messages = await async_db.find_rows(
+            'Messages', 'conversation_id', conversation['conversation_id'], since=since or None
+        )
         
         # Sort by timestamp
         conversation_messages.sort(key=lambda x: x.get('timestamp', ''))
         
         return conversation_messages
 
-    def _build_context_prompt(self, conversation_history: list, current_query: str, agent) -> str:
-        """Build a prompt with conversation history"""
-        if not conversation_history:
-            return f"System: {agent.system_instructions}\n\nUser: {current_query}\n\nAssistant:"
-        
-        # Build conversation context
-        context = f"System: {agent.system_instructions}\n\nConversation History:\n"
-        
-        for msg in conversation_history[-10:]:  # Last 10 messages for context
-            role = msg.get('role', '')
-            content = msg.get('content', '')
-            if role == 'user':
-                context += f"User: {content}\n"
-            elif role == 'assistant':
-                context += f"Assistant: {content}\n"
-        
-        context += f"\nUser: {current_query}\n\nAssistant:"
-        return context
+    async def _shadow_classify(self, query: str, fast_intent: str):
+        """Ask Gemini for a fast-path query's intent and record whether it agrees"""
+        llm_intent = await llm_service.classify_intent(query)
+        intent_classifier.record_shadow(fast_intent, llm_intent)
 
-    async def process_chat(self, request: ChatRequest) -> ChatResponse:
-        logger.info(f"Processing chat for Agent ID: {request.agent_id}")
-        
-        agent = agent_service.get_agent(request.agent_id)
-        if not agent:
-            logger.error(f"Agent ID {request.agent_id} not found")
-            return ChatResponse(
-                response="Agent not found", 
-                intent="Error", 
-                confidence_score=0.0,
-                conversation_id=""
+    def _schedule_summary(self, session: ChatSession, fold: list, summary_until: str):
+        """Fold old messages into the conversation summary in the background, once per conversation at a time"""
+        if session.conversation_id in self._summarizing:
+            return
+        self._summarizing.add(session.conversation_id)
+        task = asyncio.create_task(self._fold_history(session, fold, summary_until))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _fold_history(self, session: ChatSession, fold: list, summary_until: str):
+        """Extend the rolling summary with fold and move the verbatim window start to summary_until"""
+        conversation_id = session.conversation_id
+        try:
+            new_summary = await llm_service.summarize_history(session.summary, fold)
+            if not new_summary:
+                return
+            await self._store(conversation_id, [{
+                'op': 'update', 'sheet': 'Conversations',
+                'key': 'conversation_id', 'value': conversation_id,
+                'updates': {'summary': new_summary, 'summary_until': summary_until}
+            }])
+            session.fold(new_summary, summary_until)
+            logger.info(f"Folded {len(fold)} messages into the summary of conversation {conversation_id}")
+        except Exception as e:
+            logger.error(f"Error summarizing conversation {conversation_id}: {str(e)}")
+        finally:
+            self._summarizing.discard(conversation_id)
+
+    async def _load_agent(self, agent_id: str) -> Optional[Agent]:
+        with stage_metrics.time('agent'):
+            return await async_db.run(agent_service.get_agent, agent_id)
+
+    async def _load_session(self, request: ChatRequest) -> ChatSession:
+        """Pooled session of the conversation; storage is read only on a miss"""
+        with stage_metrics.time('conversation'):
+            session = chat_sessions.get(request.conversation_id) if request.conversation_id else None
+            if session is not None:
+                logger.info(f"Using pooled conversation session: {session.conversation_id}")
+                return session
+
+            # Get or create conversation
+            conversation, created = await self._get_or_create_conversation(
+                request.agent_id, 
+                request.conversation_id
             )
+            # A conversation created just now has no history
+            messages = [] if created else await self._get_conversation_history(conversation)
+            return ChatSession(conversation, messages, stored=not created)
 
-        # Get or create conversation
-        conversation_id = self._get_or_create_conversation(
-            request.agent_id, 
-            request.conversation_id
-        )
+    async def _begin_turn(self, request: ChatRequest) -> Optional[Tuple[Agent, ChatSession, list]]:
+        """Load the agent and the conversation session concurrently; None if the agent doesn't exist"""
+        agent, session = await asyncio.gather(self._load_agent(request.agent_id), self._load_session(request))
+        if not agent:
+            logger.error(f"Agent ID {request.agent_id} not found")
+            return None
+        chat_sessions.set(session.conversation_id, session)
 
-        # Get conversation history
-        conversation_history = self._get_conversation_history(conversation_id)
+        # Recent turns verbatim within the token budget, older ones through the rolling summary
+        window, fold = plan_history(session.messages, session.summary, settings.HISTORY_TOKEN_BUDGET)
+        if fold:
+            # fold is the oldest slice of messages; the summary will cover up to the next message
+            self._schedule_summary(session, fold, session.messages[len(fold)].get('timestamp', ''))
+        return agent, session, session.history(len(window))
 
-        # 1. Classify Intent
-        logger.info("Classifying intent...")
-        intent = await llm_service.classify_intent(request.query)
-        logger.info(f"Intent classified as: {intent}")
-        
-        # 2. Handle Intent
-        response_text = ""
-        escalated = False
-        confidence = 0.9 # Mock confidence for now
-
-        # Helper to gate tool access
-        def tool_available(tool_name: str) -> bool:
-            try:
-                return tool_name in getattr(agent, "tools", []) if agent else False
-            except Exception:
-                return False
-
-        # Dummy tool responses
-        tool_responses = {
-            "check_order_status": "I checked your order status. It is currently 'Shipped' (demo).",
-            "initiate_refund": "I initiated a refund for your order (demo).",
-            "send_email": "I sent an email notification with the latest update (demo).",
-            "create_support_ticket": "I created a support ticket for escalation to a human (demo).",
-            "apply_discount": "I applied the discount code to your account (demo).",
-            "get_customer_profile": "I fetched your profile details (demo).",
-            "update_order_address": "I updated the delivery address on your order (demo).",
-            "notify_vendor": "I notified the vendor with your message (demo).",
-        }
+    def _fast_intent(self, query: str) -> Optional[Tuple[str, float]]:
+        """Local fast-path intent, occasionally double-checked by Gemini in the background"""
+        fast = intent_classifier.classify(query)
+        if fast:
+            logger.info(f"Fast-path intent {fast[0]} ({fast[1]})")
+            if intent_classifier.should_shadow():
+                task = asyncio.create_task(self._shadow_classify(query, fast[0]))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+        return fast
 
-        tool_keywords = {
-            "check_order_status": ["check order", "order status", "where is my order", "track order"],
-            "initiate_refund": ["refund", "money back", "return"],
-            "send_email": ["email", "send mail", "notify by email"],
-            "create_support_ticket": ["ticket", "support ticket", "escalate", "escalation"],
-            "apply_discount": ["discount", "promo", "coupon"],
-            "get_customer_profile": ["profile", "account info", "customer details"],
-            "update_order_address": ["change address", "update address", "delivery address"],
-            "notify_vendor": ["vendor", "restaurant", "partner alert", "notify partner"],
-        }
+    @staticmethod
+    def _cached_answer(agent: Agent, query: str, conversation_history: list,
+                       fast: Optional[Tuple[str, float]]) -> Optional[Dict[str, Any]]:
+        """A first question this agent version has already answered can reuse that answer"""
+        if conversation_history or (fast and fast[0] != "Informational"):
+            return None
+        cached_answer = answer_cache.get(agent, query)
+        if cached_answer:
+            logger.info("Answer cache hit")
+        return cached_answer
 
+    async def _handle_action(self, agent: Agent, intent: str, query: str) -> Tuple[str, bool]:
+        """Reply and escalation flag for Escalation and Transactional intents"""
         if intent == "Escalation":
             logger.info("Intent is Escalation. Triggering escalation.")
-            escalated = True
-            response_text = "I am escalating this to a human agent. Please wait."
-        elif intent == "Transactional":
-            logger.info("Intent is Transactional. Checking for tools.")
-            lower_query = request.query.lower()
-            matched_tool = None
-            for tool_name, keywords in tool_keywords.items():
-                if any(k in lower_query for k in keywords):
-                    matched_tool = tool_name
-                    break
-
-            if matched_tool and tool_available(matched_tool):
-                logger.info(f"Executing tool: {matched_tool}")
-                response_text = tool_responses.get(matched_tool, "Action completed (demo).")
-            else:
-                logger.info("No available tool matched. Offering escalation.")
-                response_text = "I don't have access to perform that action. Would you like me to escalate this to a human?"
-        else: # Informational
-            logger.info("Intent is Informational. Generating LLM response with context.")
-            # Build response using conversation history
-            response_text = await llm_service.generate_response_with_history(agent, conversation_history, request.query)
+            return "I am escalating this to a human agent. Please wait.", True
 
-        # 3. Check Escalation Thresholds
-        logger.info(f"Checking confidence score ({confidence}) against threshold ({agent.escalation_threshold})")
-        if confidence < agent.escalation_threshold:
-            logger.warning("Confidence too low. Escalating to human.")
-            escalated = True
-            response_text = "I am not confident in my answer. Escalating to human."
+        logger.info("Intent is Transactional. Checking for tools.")
+        # First matched tool this agent has been granted
+        matched_tool = next((name for name in tool_registry.match(query) if agent.has_tool(name)), None)
+        if not matched_tool:
+            logger.info("No available tool matched. Offering escalation.")
+            return "I don't have access to perform that action. Would you like me to escalate this to a human?", False
 
-        # 4. Store messages in Google Sheets
+        logger.info(f"Executing tool: {matched_tool}")
+        try:
+            with stage_metrics.time('tool'):
+                return await tool_registry.get(matched_tool).run(agent, query), False
+        except ToolError as e:
+            logger.error(str(e))
+            return "I couldn't complete that action right now. Would you like me to escalate this to a human?", False
+
+    async def _finish_turn(self, request: ChatRequest, session: ChatSession, intent: str, intent_source: str,
+                           confidence: float, response_text: str, escalated: bool):
+        """
+        Store both messages, the conversation update and any escalation in one batch.
+        intent_source says who labelled the intent ('llm', 'fast_path' or 'cache'); the intent
+        model trains only on 'llm' labels.
+        """
+        conversation_id = session.conversation_id
         timestamp = datetime.now().isoformat()
         
         # Store user message
-        sheets_db.insert_row('Messages', {
+        writes = [{'op': 'insert', 'sheet': 'Messages', 'data': {
             'message_id': str(uuid.uuid4()),
             'conversation_id': conversation_id,
             'agent_id': request.agent_id,
@@ -175,12 +245,13 @@ class ChatService:
             'intent': intent,
             'confidence_score': confidence,
             'timestamp': timestamp,
-            'escalated': 'FALSE'
-        })
+            'escalated': 'FALSE',
+            'intent_source': intent_source
+        }}]
         
         # Store assistant message
         message_id = str(uuid.uuid4())
-        sheets_db.insert_row('Messages', {
+        writes.append({'op': 'insert', 'sheet': 'Messages', 'data': {
             'message_id': message_id,
             'conversation_id': conversation_id,
             'agent_id': request.agent_id,
@@ -189,11 +260,12 @@ class ChatService:
             'intent': intent,
             'confidence_score': confidence,
             'timestamp': timestamp,
-            'escalated': str(escalated).upper()
-        })
+            'escalated': str(escalated).upper(),
+            'intent_source': intent_source
+        }})
 
         # Update conversation message count (keep status as active unless escalated)
-        message_count = len(conversation_history) + 2  # +2 for current exchange
+        message_count = int(session.conversation.get('total_messages') or 0) + 2  # +2 for current exchange
         updates = {'total_messages': message_count}
         
         # If escalated, mark conversation as escalated with ended_at timestamp
@@ -201,14 +273,22 @@ class ChatService:
             updates['status'] = 'escalated'
             updates['ended_at'] = timestamp
         
-        sheets_db.update_row('Conversations', 'conversation_id', conversation_id, updates)
+        if session.stored:
+            writes.append({
+                'op': 'update', 'sheet': 'Conversations',
+                'key': 'conversation_id', 'value': conversation_id, 'updates': updates
+            })
+        else:
+            # First turn: the conversation row is written along with its messages
+            writes.append({'op': 'insert', 'sheet': 'Conversations', 'data': {**session.conversation, **updates}})
+            session.stored = True
 
-        # 5. Track escalations
+        # Track escalations
         if escalated:
             reason = "User Request" if intent == "Escalation" else "Low Confidence"
             escalation_id = str(uuid.uuid4())
             
-            sheets_db.insert_row('Escalations', {
+            writes.append({'op': 'insert', 'sheet': 'Escalations', 'data': {
                 'escalation_id': escalation_id,
                 'conversation_id': conversation_id,
                 'message_id': message_id,
@@ -220,9 +300,105 @@ class ChatService:
                 'resolved_at': '',
                 'resolved_by': '',
                 'resolution_notes': ''
-            })
+            }})
             logger.info(f"Added escalation #{escalation_id}")
 
+        # Counters and the feed mirror storage, so a turn that wasn't written is left out of both
+        if await self._store(conversation_id, writes):
+            query_counters.record([writes[0]['data'], writes[1]['data']])
+            activity_feed.record(writes[0]['data'], writes[1]['data'])
+        else:
+            logger.error(f"Messages of conversation {conversation_id} were not stored")
+        session.append([writes[0]['data'], writes[1]['data']], updates)
+
+    async def process_chat(self, request: ChatRequest) -> ChatResponse:
+        logger.info(f"Processing chat for Agent ID: {request.agent_id}")
+        turn_started = time.perf_counter()
+
+        # Needs only the query, so it runs before (and in two-call mode, the Gemini classification
+        # alongside) loading the agent and conversation
+        fast = self._fast_intent(request.query)
+        early_intent = None
+        if not fast and not settings.LLM_SINGLE_CALL:
+            early_intent = asyncio.create_task(llm_service.classify_intent(request.query))
+        
+        begun = None
+        try:
+            with stage_metrics.time('load'):
+                begun = await self._begin_turn(request)
+        finally:
+            if early_intent and not begun:
+                # Unknown agent or failed loads: the classification won't be used
+                early_intent.cancel()
+        if not begun:
+            return ChatResponse(
+                response="Agent not found", 
+                intent="Error", 
+                confidence_score=0.0,
+                conversation_id=""
+            )
+        agent, session, conversation_history = begun
+        conversation_id = session.conversation_id
+
+        # 1. Classify Intent (and answer, in single-call mode)
+        with stage_metrics.time('classify'):
+            logger.info("Classifying intent...")
+            turn = None
+            cached_answer = self._cached_answer(agent, request.query, conversation_history, fast)
+            if fast and fast[0] != "Informational":
+                # Escalation and Transactional replies don't need the model at all
+                intent, confidence = fast
+                intent_source = 'fast_path'
+            elif cached_answer:
+                intent, confidence = "Informational", cached_answer['confidence']
+                intent_source = 'cache'
+            elif settings.LLM_SINGLE_CALL and (
+                turn := await llm_service.classify_and_respond(agent, conversation_history, request.query)
+            ):
+                intent = turn['intent']
+                confidence = turn['confidence']
+                intent_source = 'llm'
+            else:
+                # Two-call fallback: classification alone reports no confidence
+                intent = fast[0] if fast else await (early_intent or llm_service.classify_intent(request.query))
+                confidence = 0.9
+                intent_source = 'fast_path' if fast else 'llm'
+            if early_intent and not early_intent.done():
+                # The answer cache made the early classification unnecessary
+                early_intent.cancel()
+            logger.info(f"Intent classified as: {intent}")
+
+        # 2. Handle Intent
+        with stage_metrics.time('respond'):
+            escalated = False
+            if intent in ("Escalation", "Transactional"):
+                response_text, escalated = await self._handle_action(agent, intent, request.query)
+            else: # Informational
+                logger.info("Intent is Informational. Generating LLM response with context.")
+                if cached_answer:
+                    response_text = cached_answer['answer']
+                elif turn:
+                    response_text = turn['answer']
+                else:
+                    # Build response using conversation history
+                    response_text = await llm_service.generate_response_with_history(agent, conversation_history, request.query)
+
+        # 3. Check Escalation Thresholds
+        logger.info(f"Checking confidence score ({confidence}) against threshold ({agent.escalation_threshold})")
+        if confidence < agent.escalation_threshold:
+            logger.warning("Confidence too low. Escalating to human.")
+            escalated = True
+            response_text = "I am not confident in my answer. Escalating to human."
+
+        if (intent == "Informational" and not conversation_history and not cached_answer
+                and not escalated and response_text not in FALLBACK_RESPONSES):
+            answer_cache.put(agent, request.query, response_text, confidence)
+
+        # 4. Store messages and escalations
+        with stage_metrics.time('store'):
+            await self._finish_turn(request, session, intent, intent_source, confidence, response_text, escalated)
+        stage_metrics.record('total', time.perf_counter() - turn_started)
+
         return ChatResponse(
             response=response_text,
             intent=intent,
@@ -231,9 +407,88 @@ class ChatService:
             conversation_id=conversation_id
         )
 
+    async def stream_chat(self, request: ChatRequest) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Same turn as process_chat, yielded as (event, data) pairs: 'meta' with the intent and
+        escalation decision first, then 'token' chunks of the reply, then 'done' once stored.
+        Streaming needs the answer as plain text, so intent comes from the fast path, the answer
+        cache or classify_intent (started before the loads) rather than the single structured call.
+        """
+        logger.info(f"Streaming chat for Agent ID: {request.agent_id}")
+
+        # Classification needs only the query, so it runs alongside loading the agent and conversation
+        fast = self._fast_intent(request.query)
+        early_intent = None if fast else asyncio.create_task(llm_service.classify_intent(request.query))
+
+        begun = None
+        try:
+            begun = await self._begin_turn(request)
+        finally:
+            if early_intent and not begun:
+                # Unknown agent or failed loads: the classification won't be used
+                early_intent.cancel()
+        if not begun:
+            yield 'error', {'detail': 'Agent not found'}
+            return
+        agent, session, conversation_history = begun
+        conversation_id = session.conversation_id
+
+        cached_answer = self._cached_answer(agent, request.query, conversation_history, fast)
+        if fast:
+            intent, confidence = fast
+            intent_source = 'fast_path'
+        elif cached_answer:
+            early_intent.cancel()
+            intent, confidence = "Informational", cached_answer['confidence']
+            intent_source = 'cache'
+        else:
+            intent = await early_intent
+            confidence = 0.9
+            intent_source = 'llm'
+        logger.info(f"Intent classified as: {intent}")
+
+        response_text = None
+        escalated = False
+        if intent in ("Escalation", "Transactional"):
+            response_text, escalated = await self._handle_action(agent, intent, request.query)
+        elif cached_answer:
+            response_text = cached_answer['answer']
+        if confidence < agent.escalation_threshold:
+            logger.warning("Confidence too low. Escalating to human.")
+            escalated = True
+            response_text = "I am not confident in my answer. Escalating to human."
+
+        yield 'meta', {
+            'conversation_id': conversation_id,
+            'intent': intent,
+            'confidence_score': confidence,
+            'escalated': escalated,
+        }
+
+        if response_text is None:
+            chunks = []
+            async for chunk in llm_service.stream_response_with_history(agent, conversation_history, request.query):
+                chunks.append(chunk)
+                yield 'token', {'text': chunk}
+            response_text = "".join(chunks)
+            if (intent == "Informational" and not conversation_history
+                    and response_text not in FALLBACK_RESPONSES):
+                answer_cache.put(agent, request.query, response_text, confidence)
+        else:
+            yield 'token', {'text': response_text}
+
+        await self._finish_turn(request, session, intent, intent_source, confidence, response_text, escalated)
+        yield 'done', ChatResponse(
+            response=response_text,
+            intent=intent,
+            confidence_score=confidence,
+            escalated=escalated,
+            conversation_id=conversation_id
+        ).model_dump()
+
     def get_escalations(self):
         logger.info("Fetching escalation queue")
-        records = sheets_db.get_all_rows('Escalations')
+        records = db.get_all_rows('Escalations')
         
         escalations = []
         for record in records:
@@ -249,48 +504,14 @@ class ChatService:
         
         return escalations
 
-    def get_metrics(self):
-        logger.info("Fetching metrics")
-        
-        # Get all messages
-        messages = sheets_db.get_all_rows('Messages')
-        
-        # Calculate metrics
-        total_queries = len([m for m in messages if m.get('role') == 'user'])
-        escalated_queries = len([m for m in messages if m.get('escalated') == 'TRUE'])
-        resolved_queries = total_queries - escalated_queries
-        resolution_rate = (resolved_queries / total_queries * 100) if total_queries > 0 else 0.0
-        
-        return {
-            "total_queries": total_queries,
-            "escalated_queries": escalated_queries,
-            "resolved_queries": resolved_queries,
-            "resolution_rate": round(resolution_rate, 1)
-        }
+    def get_metrics(self, agent_id: Optional[str] = None):
+        logger.info(f"Fetching metrics{f' for agent {agent_id}' if agent_id else ''}")
+        # Maintained as turns are stored; Messages are only scanned to rebuild the counters
+        return query_counters.get(agent_id)
 
     def get_recent_activity(self):
         logger.info("Fetching recent activity")
-        
-        # Get all messages
-        messages = sheets_db.get_all_rows('Messages')
-        
-        # Filter assistant messages and sort by timestamp
-        assistant_messages = [m for m in messages if m.get('role') == 'assistant']
-        assistant_messages.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
-        # Get agent names
-        activity = []
-        for msg in assistant_messages[:10]:  # Last 10
-            agent = agent_service.get_agent(msg.get('agent_id'))
-            activity.append({
-                "query": msg.get('content', '')[:100],
-                "response": msg.get('content', '')[:100],
-                "agent_name": agent.name if agent else "Unknown",
-                "intent": msg.get('intent', ''),
-                "escalated": msg.get('escalated') == 'TRUE',
-                "timestamp": msg.get('timestamp', '')
-            })
-        
-        return activity
+        # Served from memory: last 10 turns, agent names from the feed's agent map
+        return activity_feed.get(10)
 
 chat_service = ChatService()
@@ -0,0 +1,154 @@
+from app.core.config import settings
+from app.core.storage import db
+from app.core.async_storage import async_db
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _summary(total_queries: int, escalated_queries: int, confidence_sum: float) -> Dict[str, Any]:
+    """Metrics row figures from raw sums"""
+    resolved_queries = total_queries - escalated_queries
+    return {
+        'total_queries': total_queries,
+        'resolved_queries': resolved_queries,
+        'escalated_queries': escalated_queries,
+        'resolution_rate': round(resolved_queries / total_queries * 100, 1) if total_queries else 0.0,
+        'avg_confidence': round(confidence_sum / total_queries, 3) if total_queries else 0.0,
+    }
+
+
+class MetricsRollup:
+    """
+    Aggregates each closed day's Messages into one Metrics row per agent (date, agent_id,
+    total/resolved/escalated queries, resolution_rate, avg_confidence), so date-range analytics
+    read the small Metrics table plus only the messages of days not rolled up yet (normally today).
+    """
+    def __init__(self, interval: float, grace: float):
+        self.interval = interval
+        # A day is closed this long after midnight, leaving time for spooled writes to land
+        self.grace = grace
+        self.last_run: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _aggregate(messages: Iterable[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+        """(date, agent_id) -> query, escalation and confidence sums, counted like get_metrics"""
+        sums: Dict[tuple, Dict[str, Any]] = {}
+        for message in messages:
+            day = str(message.get('timestamp', ''))[:10]
+            if not day:
+                continue
+            bucket = sums.setdefault((day, str(message.get('agent_id', ''))), {'total': 0, 'escalated': 0, 'confidence': 0.0})
+            if message.get('role') == 'user':
+                bucket['total'] += 1
+                bucket['confidence'] += _number(message.get('confidence_score'))
+            if message.get('escalated') == 'TRUE':
+                bucket['escalated'] += 1
+        return sums
+
+    @staticmethod
+    def _last_rolled_day(metrics: List[Dict[str, Any]]) -> str:
+        return max((str(row.get('date', '')) for row in metrics), default='')
+
+    def rollup(self) -> Dict[str, Any]:
+        """Write Metrics rows for every closed day after the last rolled-up one, in one bulk insert"""
+        with self._lock:
+            return self._rollup()
+
+    def _rollup(self) -> Dict[str, Any]:
+        metrics = db.get_all_rows('Metrics')
+        last_day = self._last_rolled_day(metrics)
+        closed_before = (datetime.now() - timedelta(seconds=self.grace)).date().isoformat()
+
+        since = (date.fromisoformat(last_day) + timedelta(days=1)).isoformat() if last_day else None
+        if since and since >= closed_before:
+            self.last_run = {'days': [], 'rows': 0, 'at': datetime.now().isoformat()}
+            return self.last_run
+
+        sums = self._aggregate(db.get_all_rows('Messages', since=since))
+        rows = []
+        for (day, agent_id), bucket in sorted(sums.items()):
+            if day >= closed_before or (last_day and day <= last_day):
+                continue
+            rows.append({'date': day, 'agent_id': agent_id,
+                         **_summary(bucket['total'], bucket['escalated'], bucket['confidence'])})
+        if rows:
+            db.insert_rows('Metrics', rows)
+            db.flush()
+        days = sorted({row['date'] for row in rows})
+        self.last_run = {'days': days, 'rows': len(rows), 'at': datetime.now().isoformat()}
+        if rows:
+            logger.info(f"Rolled up {len(days)} day(s) of messages into {len(rows)} Metrics rows")
+        return self.last_run
+
+    async def run_periodically(self):
+        """Background loop started by the app lifespan; cancelled at shutdown"""
+        while True:
+            try:
+                await async_db.run(self.rollup)
+            except Exception as e:
+                logger.error(f"Metrics rollup failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def get_range(self, start: str, end: str, agent_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Totals, a per-day series and a per-agent breakdown for start..end (inclusive ISO dates).
+        Rolled-up days come from Metrics; only later days (normally just today) read raw messages.
+        """
+        wanted = set(agent_ids) if agent_ids else None
+        metrics = db.get_all_rows('Metrics')
+        last_day = self._last_rolled_day(metrics)
+
+        # (date, agent_id) -> sums; avg_confidence is weighted back into a sum to combine days
+        sums: Dict[tuple, Dict[str, Any]] = {}
+        for row in metrics:
+            day, agent_id = str(row.get('date', '')), str(row.get('agent_id', ''))
+            if start <= day <= end and (wanted is None or agent_id in wanted):
+                total = int(_number(row.get('total_queries')))
+                sums[(day, agent_id)] = {
+                    'total': total,
+                    'escalated': int(_number(row.get('escalated_queries'))),
+                    'confidence': _number(row.get('avg_confidence')) * total,
+                }
+
+        raw_since = max(start, (date.fromisoformat(last_day) + timedelta(days=1)).isoformat()) if last_day else start
+        raw_days = 0
+        if raw_since <= end:
+            raw = self._aggregate(db.get_all_rows('Messages', since=raw_since))
+            for (day, agent_id), bucket in raw.items():
+                if raw_since <= day <= end and (wanted is None or agent_id in wanted):
+                    sums[(day, agent_id)] = bucket
+            raw_days = (date.fromisoformat(end) - date.fromisoformat(raw_since)).days + 1
+
+        def combine(keys) -> Dict[str, Any]:
+            buckets = [sums[key] for key in keys]
+            return _summary(sum(b['total'] for b in buckets), sum(b['escalated'] for b in buckets),
+                            sum(b['confidence'] for b in buckets))
+
+        days = sorted({day for day, _ in sums})
+        agents = sorted({agent_id for _, agent_id in sums})
+        return {
+            'start': start,
+            'end': end,
+            'agent_ids': sorted(wanted) if wanted else None,
+            'totals': combine(sums),
+            'days': [{'date': day, **combine(k for k in sums if k[0] == day)} for day in days],
+            'agents': [{'agent_id': agent_id, **combine(k for k in sums if k[1] == agent_id)} for agent_id in agents],
+            'rolled_up_through': last_day or None,
+            'raw_days_read': raw_days,
+        }
+
+# Singleton instance
+metrics_rollup = MetricsRollup(settings.METRICS_ROLLUP_INTERVAL_SECONDS, settings.METRICS_ROLLUP_GRACE_SECONDS)
@@ -1,22 +1,25 @@
 """
-Script to initialize Google Sheets database with proper schema
-Run this once to set up your spreadsheet
+Script to initialize the storage backend with proper schema
+Run this once to set up your spreadsheet (or SQLite database)
 """
-from app.core.sheets_db import sheets_db
+from app.core.storage import db
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def main():
-    logger.info("Starting Google Sheets database initialization...")
+    logger.info(f"Starting {db.name} database initialization...")
     
     try:
         # Initialize the schema
-        sheets_db.initialize_schema()
+        db.initialize_schema()
         logger.info("✅ Database schema initialized successfully!")
-        logger.info(f"📊 Spreadsheet: {sheets_db.spreadsheet.title}")
-        logger.info(f"🔗 URL: {sheets_db.spreadsheet.url}")
+        if db.name == 'sheets':
+            logger.info(f"📊 Spreadsheet: {db.spreadsheet.title}")
+            logger.info(f"🔗 URL: {db.spreadsheet.url}")
+        else:
+            logger.info(f"📁 SQLite file: {db.path}")
         
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {str(e)}")
@@ -0,0 +1,195 @@
+"""
+Load test for POST /chat/ that runs entirely offline: the fake LLM replaces Gemini and an
+in-memory spreadsheet (or a throwaway SQLite file) replaces Google Sheets.
+Replays multi-turn conversations concurrently against the FastAPI app in-process and reports
+throughput plus p50/p95/p99 latency end to end and per pipeline stage.
+Exits non-zero when --max-p95-ms or --max-error-rate is exceeded, so CI can catch regressions.
+
+    python load_test.py --conversations 200 --concurrency 20 --max-p95-ms 3000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger("load_test")
+
+# Multi-turn conversations replayed round-robin; {n} becomes a random order number
+DEFAULT_CONVERSATIONS = [
+    ["What are your opening hours?", "Do you deliver on weekends?", "Thanks, that helps"],
+    ["Where is my order {n}?", "Can I change the delivery address for order {n}?", "Ok thanks"],
+    ["I want a refund for order {n}", "It arrived damaged", "Let me talk to a human please"],
+    ["How do I reset my password?", "I did that but the email never came", "What else can I try?",
+     "I'm not sure that worked either"],
+    ["Do you have vegetarian options?", "What about gluten free?"],
+    ["Can I speak to a manager?"],
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test of the chat pipeline")
+    parser.add_argument("--conversations", type=int, default=100, help="Conversations to replay")
+    parser.add_argument("--concurrency", type=int, default=10, help="Conversations in flight at once")
+    parser.add_argument("--warmup", type=int, default=5, help="Conversations run before measuring")
+    parser.add_argument("--script", help="JSON list of conversations (each a list of user queries)")
+    parser.add_argument("--storage", choices=["sheets", "sqlite"], default="sheets",
+                        help="In-memory fake spreadsheet or a temporary SQLite file")
+    parser.add_argument("--sheets-latency-ms", type=float, default=50, help="Simulated Sheets API round trip")
+    parser.add_argument("--llm-latency-ms", type=float, default=400, help="Median fake LLM latency")
+    parser.add_argument("--llm-p99-ms", type=float, default=2000, help="p99 fake LLM latency")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of fake LLM calls failing with 503")
+    parser.add_argument("--llm-script", help="JSON phrase -> intent rules for the fake LLM")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if end-to-end p95 latency is higher")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if the share of failed requests is higher")
+    return parser.parse_args()
+
+
+def configure(args, workdir: str):
+    """Point the app at the offline backends; must run before any app module is imported"""
+    os.environ.update({
+        'LLM_BACKEND': 'fake',
+        'FAKE_LLM_LATENCY_MEDIAN_MS': str(args.llm_latency_ms),
+        'FAKE_LLM_LATENCY_P99_MS': str(args.llm_p99_ms),
+        'FAKE_LLM_ERROR_RATE': str(args.llm_error_rate),
+        'FAKE_LLM_SCRIPT_PATH': args.llm_script or '',
+        'STORAGE_BACKEND': args.storage,
+        'SHEETS_FAKE': 'true',
+        'SHEETS_FAKE_LATENCY_MS': str(args.sheets_latency_ms),
+        'GOOGLE_SPREADSHEET_ID': 'load-test',
+        'SQLITE_DB_PATH': os.path.join(workdir, 'load_test.db'),
+        'STORAGE_WAL_PATH': os.path.join(workdir, 'load_test.wal'),
+        'INTENT_MODEL_PATH': os.path.join(workdir, 'intent_model.json'),
+        'ANALYTICS_COUNTERS_PATH': os.path.join(workdir, 'analytics_counters.json'),
+    })
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+    from app.core.storage import db
+    from app.core.metrics import stage_metrics, summarize
+    from app.core.llm_gateway import llm_gateway
+
+    logging.getLogger().setLevel(logging.ERROR)
+    db.initialize_schema()
+
+    conversations = DEFAULT_CONVERSATIONS
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            conversations = json.load(f)
+    rng = random.Random(args.seed)
+
+    latencies = []
+    results = {'requests': 0, 'errors': 0, 'intents': {}, 'escalated': 0}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120) as client:
+            response = await client.post("/agents/", json={
+                'name': 'Load test agent',
+                'persona': 'Friendly support agent',
+                'system_instructions': 'Answer customer questions briefly.',
+                'tools': ['check_order_status', 'initiate_refund', 'update_order_address'],
+                'escalation_threshold': 0.6,
+            })
+            response.raise_for_status()
+            agent_id = response.json()['id']
+
+            async def converse(index: int, measure: bool):
+                conversation_id = None
+                for query in conversations[index % len(conversations)]:
+                    body = {'agent_id': agent_id, 'query': query.replace('{n}', str(rng.randint(10000, 99999)))}
+                    if conversation_id:
+                        body['conversation_id'] = conversation_id
+                    started = time.perf_counter()
+                    try:
+                        response = await client.post("/chat/", json=body)
+                        ok = response.status_code == 200
+                    except Exception as e:
+                        logger.error(f"Request failed: {str(e)}")
+                        ok = False
+                    elapsed = time.perf_counter() - started
+                    if not measure:
+                        if ok:
+                            conversation_id = response.json()['conversation_id']
+                        continue
+                    results['requests'] += 1
+                    latencies.append(elapsed)
+                    if not ok:
+                        results['errors'] += 1
+                        continue
+                    reply = response.json()
+                    conversation_id = reply['conversation_id']
+                    results['intents'][reply['intent']] = results['intents'].get(reply['intent'], 0) + 1
+                    results['escalated'] += bool(reply.get('escalated'))
+
+            limit = asyncio.Semaphore(max(args.concurrency, 1))
+
+            async def limited(index: int, measure: bool):
+                async with limit:
+                    await converse(index, measure)
+
+            await asyncio.gather(*(limited(i, False) for i in range(args.warmup)))
+            stage_metrics.reset()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(limited(i, True) for i in range(args.conversations)))
+            duration = time.perf_counter() - started
+
+    return {
+        **results,
+        'conversations': args.conversations,
+        'concurrency': args.concurrency,
+        'storage': args.storage,
+        'duration_seconds': round(duration, 2),
+        'throughput_rps': round(results['requests'] / duration, 2) if duration else 0.0,
+        'error_rate': round(results['errors'] / results['requests'], 4) if results['requests'] else 0.0,
+        'latency': summarize(latencies),
+        'stages': stage_metrics.stats(),
+        'llm_gateway': llm_gateway.stats(),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['requests']} requests in {report['duration_seconds']}s "
+          f"({report['throughput_rps']} req/s, {report['concurrency']} concurrent conversations, {report['storage']} storage)")
+    print(f"errors: {report['errors']} ({report['error_rate'] * 100:.2f}%), escalated: {report['escalated']}, intents: {report['intents']}")
+    print(f"\n{'stage':<12}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    rows = [('end-to-end', report['latency'])] + sorted(report['stages'].items())
+    for stage, stats in rows:
+        print(f"{stage:<12}{stats['count']:>8}{stats['mean_ms']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+    gateway = report['llm_gateway']
+    print(f"\nLLM calls: {gateway['calls']}, coalesced: {gateway['coalesced']}, breaker: {gateway['breaker']['state']}")
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        configure(args, workdir)
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if args.max_p95_ms is not None and report['latency']['p95_ms'] > args.max_p95_ms:
+        failures.append(f"p95 {report['latency']['p95_ms']}ms > {args.max_p95_ms}ms")
+    if args.max_error_rate is not None and report['error_rate'] > args.max_error_rate:
+        failures.append(f"error rate {report['error_rate']} > {args.max_error_rate}")
+    if failures:
+        print(f"\n❌ Load test failed: {'; '.join(failures)}")
+        sys.exit(1)
+    print("\n✅ Load test passed")
+
+if __name__ == "__main__":
+    main()
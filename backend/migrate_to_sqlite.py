@@ -0,0 +1,41 @@
+"""
+Script to copy an existing Google Sheets database into SQLite
+Run it once, then set STORAGE_BACKEND=sqlite (re-running replaces the copied tables)
+"""
+from app.core.config import settings
+from app.core.storage_backend import SCHEMA
+from app.core.sheets_db import GoogleSheetsDB
+from app.core.sqlite_db import SQLiteDB
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the Google Sheets database into SQLite")
+    parser.add_argument("--db", default=settings.SQLITE_DB_PATH, help="SQLite file to write")
+    args = parser.parse_args()
+
+    logger.info(f"Migrating spreadsheet {settings.GOOGLE_SPREADSHEET_ID} into {args.db}...")
+
+    try:
+        source = GoogleSheetsDB()
+        target = SQLiteDB(args.db)
+
+        for sheet_name in SCHEMA:
+            rows = source.get_all_rows(sheet_name)
+            if not rows:
+                # get_all_rows also returns [] on read errors; never wipe a table because of one
+                logger.warning(f"⚠️ {sheet_name}: no rows read, leaving existing SQLite table untouched")
+                continue
+            copied = target.import_rows(sheet_name, rows)
+            logger.info(f"✅ {sheet_name}: copied {copied} rows")
+
+        logger.info("✅ Migration complete. Set STORAGE_BACKEND=sqlite to use it.")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Script to (re)train the local intent model from user messages labelled by Gemini
+Writes INTENT_MODEL_PATH; running servers pick it up via POST /analytics/intent-classifier/reload
+"""
+from app.core.config import settings
+from app.core.storage import db
+from app.core.llm import VALID_INTENTS
+from app.core.intent_classifier import intent_classifier, train_model
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent classifier from the Messages table")
+    parser.add_argument("--epochs", type=int, default=30, help="SGD passes over the training data")
+    parser.add_argument("--min-examples", type=int, default=settings.INTENT_MODEL_MIN_EXAMPLES,
+                        help="Refuse to write a model trained on fewer labelled messages")
+    parser.add_argument("--include-legacy", action="store_true",
+                        help="Also train on messages stored before intent_source was recorded, except "
+                             "rule hits (confidence 1.0); these may include the model's own predictions")
+    args = parser.parse_args()
+
+    logger.info(f"Loading labelled messages from {db.name} storage...")
+    examples = []
+    skipped = 0
+    for message in db.get_all_rows('Messages'):
+        if message.get('role') != 'user' or message.get('intent') not in VALID_INTENTS or not message.get('content'):
+            continue
+        # Only Gemini's labels are ground truth; fast-path and cached intents would train the model on itself
+        source = message.get('intent_source')
+        if source == 'llm' or (args.include_legacy and not source and str(message.get('confidence_score')) not in ('1', '1.0')):
+            examples.append((str(message.get('content', '')), message.get('intent')))
+        else:
+            skipped += 1
+    counts = {intent: sum(1 for _, label in examples if label == intent) for intent in VALID_INTENTS}
+    logger.info(f"Found {len(examples)} Gemini-labelled user messages: {counts} ({skipped} fast-path, cached or legacy skipped)")
+
+    if len(examples) < args.min_examples:
+        logger.error(f"❌ Need at least {args.min_examples} labelled messages to train; keeping the current model")
+        return
+
+    model = train_model(examples, epochs=args.epochs)
+    intent_classifier.save(model)
+    logger.info(
+        f"✅ Wrote {settings.INTENT_MODEL_PATH}: {model['examples']} training examples, "
+        f"{len(model['idf'])} features, holdout accuracy {model['holdout_accuracy']}"
+    )
+
+if __name__ == "__main__":
+    main()